@@ -0,0 +1,303 @@
+"""Асинхронный движок опроса API Практикума.
+
+Запуск: python homework.py --engine=async
+Проверка и разбор ответа берутся из homework без изменений.
+Кэш ответов RESPONSE_CACHE здесь не используется: запросы идут
+без If-None-Match, и курсор двигается на каждом ответе.
+
+Сообщения в Telegram не отправляются из event loop напрямую,
+а ставятся в ту же очередь, что и в синхронном движке: журнал
+DurableOutbox перед Outbox с общим и по-чатовым лимитами Telegram
+и паузой на RetryAfter. Недоставленное уходит после перезапуска.
+"""
+import asyncio
+import logging
+import random
+import signal
+import time
+from http import HTTPStatus
+
+import aiohttp
+
+import homework
+from commands import CHECK_REPLY, is_check_command
+from deadline import Deadline
+from durable_outbox import DurableOutbox
+from singleflight import AsyncSingleFlight
+from exceptions import NotSendException, ResponseError, TelegrammError
+from records import Homework
+from retry import status_error
+
+TELEGRAM_UPDATES = 'https://api.telegram.org/bot{token}/getUpdates'
+UPDATES_TIMEOUT = 30
+COMMANDS_RETRY_DELAY = 5
+MAX_CONNECTIONS = 100
+MAX_CONCURRENCY = 1000
+API_FLIGHTS = AsyncSingleFlight()
+
+logger = logging.getLogger(__name__)
+
+
+def client_timeout(deadline, stage):
+    """Таймауты aiohttp из остатка бюджета цикла."""
+    connect, total = deadline.timeout(stage)
+    return aiohttp.ClientTimeout(total=total, connect=connect)
+
+
+async def get_api_answer(http, current_timestamp, headers, deadline):
+    """Асинхронно запрашиваем статусы домашек."""
+    await homework.API_LIMITER.acquire_async(
+        headers.get('Authorization'), deadline
+    )
+    params = {'from_date': current_timestamp or int(time.time())}
+    logger.info('Отправляем запрос к API.')
+    try:
+        async with http.get(
+            homework.ENDPOINT, headers=headers, params=params,
+            timeout=client_timeout(deadline, 'fetch')
+        ) as homework_statuses:
+            if homework_statuses.status != HTTPStatus.OK:
+                raise status_error(homework_statuses.status)
+            return homework.DECODE_JSON(await homework_statuses.read())
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        raise ResponseError(f'API недоступен: {error!r}')
+
+
+async def enqueue(outbox, chat_id, message, key=None):
+    """Ставим сообщение в очередь, не блокируя event loop."""
+    await asyncio.to_thread(outbox.put, chat_id, message, key)
+
+
+async def poll_once(http, tenant, outbox):
+    """Один цикл опроса тенанта, возвращает список его домашек.
+
+    Тенанту назначается следующий интервал опроса.
+    """
+    deadline = Deadline(homework.CYCLE_BUDGET, homework.CONNECT_TIMEOUT)
+    response = await API_FLIGHTS.do(
+        (tenant.practicum_token, tenant.current_timestamp),
+        homework.API_RETRY.call_async,
+        get_api_answer, http, tenant.current_timestamp, tenant.headers,
+        deadline, deadline=deadline
+    )
+    deadline.check('validate')
+    homeworks = [
+        Homework.from_dict(item) for item in homework.check_response(response)
+    ]
+    state = await asyncio.to_thread(homework.STATES.get, tenant.name)
+    changed = state.diff(homeworks)
+    try:
+        for item in changed:
+            await enqueue(
+                outbox, tenant.chat_id, homework.parse_status(item),
+                homework.notification_key(tenant, item)
+            )
+            state.update(item)
+            logger.info('Сообщение поставлено в очередь')
+    finally:
+        if changed:
+            await asyncio.to_thread(homework.STATES.put, tenant.name, state)
+    tenant.current_timestamp = response.get(
+        'current_date', tenant.current_timestamp
+    )
+    homework.CHECKPOINTS.update(tenant.name, tenant.current_timestamp)
+    homework.POLL_INTERVAL.observe(
+        tenant, homeworks, time.time(), state.statuses.values()
+    )
+    return homeworks
+
+
+async def sleep(wakeup, delay):
+    """Спим delay секунд или пока не сработает wakeup."""
+    try:
+        await asyncio.wait_for(wakeup.wait(), delay)
+    except asyncio.TimeoutError:
+        pass
+    wakeup.clear()
+
+
+async def watch(http, tenant, outbox, semaphore, stopping, wakeup):
+    """Опрашиваем API для одного тенанта до события остановки.
+
+    Опросы сдвигаются на случайные доли POLL_JITTER, чтобы
+    тенанты не опрашивались одновременными всплесками.
+    wakeup прерывает ожидание: опрос начинается сразу.
+    """
+    await sleep(wakeup, homework.POLL_JITTER * random.random())
+    while not stopping.is_set():
+        try:
+            async with semaphore:
+                await poll_once(http, tenant, outbox)
+        except NotSendException as error:
+            logger.warning(error)
+            breaker = homework.API_RETRY.breaker
+            await sleep(wakeup, breaker.seconds_until_retry())
+        except Exception as error:
+            logger.error(f'Сбой в работе программы: {error}')
+            message = homework.ERROR_DIGEST.record(tenant.chat_id, error)
+            if message is not None:
+                await enqueue(outbox, tenant.chat_id, message)
+        await sleep(wakeup, (tenant.interval or homework.RETRY_TIME)
+                    + homework.POLL_JITTER * random.random())
+
+
+async def send_error_digests(outbox):
+    """Периодически отправляем сводки по повторяющимся ошибкам."""
+    while True:
+        await asyncio.sleep(homework.ERROR_DIGEST.window)
+        for chat_id, summary in homework.ERROR_DIGEST.due():
+            await enqueue(outbox, chat_id, summary)
+
+
+async def flush_checkpoints():
+    """Периодически сохраняем курсоры тенантов на диск."""
+    while True:
+        await asyncio.sleep(homework.CHECKPOINTS.flush_interval)
+        await asyncio.to_thread(homework.CHECKPOINTS.flush)
+
+
+async def get_updates(http, url, offset):
+    """Один long polling запрос getUpdates, возвращает обновления."""
+    async with http.post(url, json={
+        'offset': offset, 'timeout': UPDATES_TIMEOUT,
+        'allowed_updates': ['message'],
+    }, timeout=aiohttp.ClientTimeout(
+        total=UPDATES_TIMEOUT + homework.READ_TIMEOUT
+    )) as answer:
+        body = await answer.json(content_type=None)
+    if not isinstance(body, dict):
+        body = {'description': body}
+    if answer.status != HTTPStatus.OK or not body.get('ok'):
+        raise TelegrammError(f'getUpdates: статус {answer.status}, '
+                             f'{body.get("description")}')
+    return body.get('result', [])
+
+
+async def listen_commands(http, on_check, chats):
+    """Получаем сообщения бота long polling'ом и обрабатываем /check.
+
+    После ошибки, в том числе ответа Telegram не 200,
+    следующий запрос делается через COMMANDS_RETRY_DELAY секунд.
+    """
+    url = TELEGRAM_UPDATES.format(token=homework.TELEGRAM_TOKEN)
+    chats = {str(chat_id) for chat_id in chats}
+    offset = None
+    while True:
+        try:
+            updates = await get_updates(http, url, offset)
+        except (aiohttp.ClientError, asyncio.TimeoutError,
+                ValueError, TelegrammError) as error:
+            logger.error(f'Не удалось получить команды: {error!r}')
+            await asyncio.sleep(COMMANDS_RETRY_DELAY)
+            continue
+        for update in updates:
+            offset = update['update_id'] + 1
+            message = update.get('message') or {}
+            chat_id = str(message.get('chat', {}).get('id'))
+            if is_check_command(message.get('text')) and chat_id in chats:
+                logger.info(f'Запрошена проверка для чата {chat_id}')
+                await on_check(chat_id)
+
+
+def start_background(http, tenants, outbox, on_check):
+    """Фоновые задачи: сводки ошибок, запись курсоров и команды."""
+    background = [
+        asyncio.create_task(send_error_digests(outbox)),
+        asyncio.create_task(flush_checkpoints()),
+    ]
+    if homework.LISTEN_COMMANDS:
+        background.append(asyncio.create_task(listen_commands(
+            http, on_check, [tenant.chat_id for tenant in tenants]
+        )))
+    return background
+
+
+async def stop_tasks(watchers, background):
+    """Даем опросам время до SHUTDOWN_DEADLINE, остальное отменяем."""
+    pending = set()
+    if watchers:
+        _, pending = await asyncio.wait(
+            watchers, timeout=max(0, homework.SHUTDOWN_DEADLINE.remaining())
+        )
+    for task in [*pending, *background]:
+        task.cancel()
+    await asyncio.gather(*pending, *background, return_exceptions=True)
+
+
+async def run(tenants, outbox):
+    """Опрашиваем всех тенантов конкурентно в одном event loop.
+
+    По SIGTERM/SIGINT новые опросы не начинаются, текущие
+    дорабатываются в пределах SHUTDOWN_TIMEOUT, который они делят
+    с досылкой очереди outbox. SIGUSR1 и команда /check будят
+    ожидающих тенантов для немедленного опроса.
+    """
+    stopping = asyncio.Event()
+    wakeups = {tenant: asyncio.Event() for tenant in tenants}
+
+    def wake(chat_id=None):
+        for tenant, wakeup in wakeups.items():
+            if chat_id is None or str(tenant.chat_id) == chat_id:
+                wakeup.set()
+
+    def stop():
+        homework.SHUTDOWN_DEADLINE.cap(homework.SHUTDOWN_TIMEOUT)
+        stopping.set()
+        wake()
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop)
+    loop.add_signal_handler(signal.SIGUSR1, wake)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS)
+    try:
+        async with aiohttp.ClientSession(connector=connector) as http:
+
+            async def check_requested(chat_id):
+                await enqueue(outbox, chat_id, CHECK_REPLY)
+                wake(chat_id)
+
+            background = start_background(
+                http, tenants, outbox, check_requested
+            )
+            watchers = [
+                asyncio.create_task(watch(
+                    http, tenant, outbox, semaphore, stopping,
+                    wakeups[tenant]
+                ))
+                for tenant in tenants
+            ]
+            await stopping.wait()
+            logger.info('Получен сигнал остановки, завершаем работу')
+            await stop_tasks(watchers, background)
+    finally:
+        homework.CHECKPOINTS.flush(force=True)
+        homework.STATES.flush()
+        logger.info('Асинхронный движок остановлен')
+
+
+def main(tenants=None):
+    """Точка входа асинхронного движка.
+
+    tenants передает супервизор, как и в homework.main.
+    """
+    if not homework.TENANTS_FILE and not homework.check_tokens():
+        logger.critical('Отсутствует одна из переменных окружения: '
+                        'PRACTICUM_TOKEN, '
+                        'TELEGRAM_TOKEN, '
+                        'TELEGRAM_CHAT_ID')
+    logger.debug('Асинхронный движок включен')
+    chats = None
+    if tenants is None:
+        tenants = homework.load_registry()
+    else:
+        chats = [tenant.chat_id for tenant in tenants]
+    outbox = DurableOutbox(
+        homework.OUTBOX_DB, homework.make_outbox(homework.make_bot())
+    ).start(chats)
+    try:
+        asyncio.run(run(tenants, outbox))
+    finally:
+        homework.SHUTDOWN_DEADLINE.cap(homework.SHUTDOWN_TIMEOUT)
+        outbox.stop(max(0, homework.SHUTDOWN_DEADLINE.remaining()))
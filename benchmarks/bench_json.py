@@ -0,0 +1,48 @@
+"""Микробенчмарк разбора больших историй домашек.
+
+Запуск: python benchmarks/bench_json.py [количество домашек]
+"""
+import json
+import sys
+import timeit
+from os.path import abspath, dirname
+
+sys.path.append(dirname(dirname(abspath(__file__))))
+
+from jsondecode import BACKENDS  # noqa: E402
+
+STATUSES = ('approved', 'reviewing', 'rejected')
+
+
+def make_history(size):
+    """Ответ API с историей из size домашек."""
+    return json.dumps({
+        'homeworks': [
+            {
+                'id': index,
+                'status': STATUSES[index % len(STATUSES)],
+                'homework_name': f'student__hw{index:05}.zip',
+                'reviewer_comment': 'Код аккуратный, но есть замечания. '
+                                    * (index % 5 + 1),
+                'date_updated': '2022-02-13T14:40:57Z',
+                'lesson_name': f'Спринт {index % 20}',
+            }
+            for index in range(size)
+        ],
+        'current_date': 1644763257,
+    }, ensure_ascii=False).encode('utf-8')
+
+
+def main():
+    """Сравниваем доступные бэкенды на одном ответе."""
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    body = make_history(size)
+    print(f'Домашек: {size}, размер ответа: {len(body) / 1024:.0f} КиБ')
+    for name, loads in BACKENDS.items():
+        runs = 20
+        seconds = timeit.timeit(lambda: loads(body), number=runs) / runs
+        print(f'{name:>8}: {seconds * 1000:.2f} мс на разбор')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Кэш ответов API для условных GET-запросов."""
+import threading
+
+
+class CacheEntry:
+    """Сохраненный ответ API вместе с валидаторами."""
+
+    __slots__ = ('from_date', 'etag', 'last_modified', 'response',
+                 'homeworks')
+
+    def __init__(self, from_date, etag, last_modified, response, homeworks):
+        self.from_date = from_date
+        self.etag = etag
+        self.last_modified = last_modified
+        self.response = response
+        self.homeworks = homeworks
+
+
+class ResponseCache:
+    """Хранит ETag/Last-Modified и последний ответ по (token, from_date).
+
+    Курсор from_date только растет, поэтому на каждый токен
+    держим одну запись: ответ для более старого курсора уже не нужен.
+    Попадания возможны, потому что poll_tenant не двигает курсор,
+    пока ответы пустые (см. homework.next_cursor). Асинхронный
+    движок условных запросов не делает и кэш не использует.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, token, from_date):
+        entry = self._entries.get(token)
+        if entry is None or entry.from_date != from_date:
+            return None
+        return entry
+
+    def conditional_headers(self, token, from_date):
+        """Заголовки If-None-Match/If-Modified-Since для запроса."""
+        entry = self._lookup(token, from_date)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def hit(self, token, from_date):
+        """Возвращаем запись для ответа 304 Not Modified."""
+        entry = self._lookup(token, from_date)
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+        return entry
+
+    def store(self, token, from_date, headers, response, homeworks):
+        """Запоминаем проверенный ответ и его валидаторы."""
+        with self._lock:
+            self.misses += 1
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            self._entries.pop(token, None)
+            return
+        self._entries[token] = CacheEntry(
+            from_date, etag, last_modified, response, homeworks
+        )
+
+    def stats(self):
+        """Счетчики попаданий и промахов кэша."""
+        return {'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,92 @@
+"""Сохранение курсоров current_date тенантов между перезапусками."""
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CheckpointStore:
+    """Курсоры всех тенантов в одном json-файле.
+
+    update() только меняет значение в памяти, а flush() раз
+    в flush_interval секунд записывает все изменения сразу:
+    во временный файл, fsync и атомарный os.replace. Запись идет
+    под flock и сливается с содержимым файла, так что один файл
+    могут делить несколько процессов с разными тенантами.
+    """
+
+    def __init__(self, path, flush_interval=5, clock=time.monotonic):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self._cursors = {}
+        self._changed = {}
+        self._flushed_at = clock()
+        self._lock = threading.Lock()
+        self.writes = 0
+
+    def _read(self):
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def load(self):
+        """Читаем сохраненные курсоры."""
+        cursors = self._read()
+        with self._lock:
+            self._cursors = {**cursors, **self._cursors}
+        logger.info(f'Восстановлено курсоров: {len(cursors)}')
+        return cursors
+
+    def get(self, name, default=None):
+        """Курсор тенанта или default."""
+        with self._lock:
+            return self._cursors.get(str(name), default)
+
+    def update(self, name, cursor):
+        """Запоминаем новый курсор тенанта."""
+        with self._lock:
+            if self._cursors.get(str(name)) != cursor:
+                self._cursors[str(name)] = cursor
+                self._changed[str(name)] = cursor
+
+    def flush(self, force=False):
+        """Записываем изменения, если прошел интервал или force."""
+        with self._lock:
+            if not self._changed:
+                return False
+            if not force and (
+                self.clock() - self._flushed_at < self.flush_interval
+            ):
+                return False
+            changed, self._changed = self._changed, {}
+            self._flushed_at = self.clock()
+        import fcntl
+
+        with open(f'{self.path}.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                self._write({**self._read(), **changed})
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        self.writes += 1
+        return True
+
+    def _write(self, cursors):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump(cursors, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
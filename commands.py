@@ -0,0 +1,74 @@
+"""Команды, которые бот принимает из Telegram."""
+import logging
+import threading
+
+import telegram
+
+CHECK_COMMAND = '/check'
+CHECK_REPLY = 'Проверяю статус домашек.'
+
+logger = logging.getLogger(__name__)
+
+
+def is_check_command(text):
+    """Текст сообщения - команда /check (в том числе /check@имя_бота)."""
+    if not text:
+        return False
+    command = text.split(maxsplit=1)[0]
+    return command.split('@', 1)[0] == CHECK_COMMAND
+
+
+class CommandListener:
+    """Поток, получающий сообщения бота long polling'ом.
+
+    На /check из чата одного из тенантов вызывается
+    on_check(chat_id); сообщения из чужих чатов игнорируются.
+    """
+
+    def __init__(self, bot, on_check, chats, timeout=30, retry_delay=5):
+        self.bot = bot
+        self.on_check = on_check
+        self.chats = {str(chat_id) for chat_id in chats}
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+        self._offset = None
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._listen, name='commands', daemon=True
+        )
+
+    def start(self):
+        """Запускаем получение команд."""
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Останавливаем получение команд после текущего запроса."""
+        self._stopping.set()
+
+    def handle(self, updates):
+        """Обрабатываем пачку обновлений и сдвигаем offset."""
+        for update in updates:
+            self._offset = update.update_id + 1
+            message = update.effective_message
+            if message is None or not is_check_command(message.text):
+                continue
+            chat_id = str(message.chat_id)
+            if chat_id not in self.chats:
+                logger.warning(f'Команда из неизвестного чата {chat_id}')
+                continue
+            logger.info(f'Запрошена проверка для чата {chat_id}')
+            self.on_check(chat_id)
+
+    def _listen(self):
+        while not self._stopping.is_set():
+            try:
+                updates = self.bot.get_updates(
+                    offset=self._offset, timeout=self.timeout,
+                    allowed_updates=['message']
+                )
+            except telegram.error.TelegramError as error:
+                logger.error(f'Не удалось получить команды: {error}')
+                self._stopping.wait(self.retry_delay)
+                continue
+            self.handle(updates)
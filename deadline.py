@@ -0,0 +1,46 @@
+"""Бюджет времени на цикл опроса и таймауты для каждого этапа."""
+import time
+
+from exceptions import DeadlineExceededError
+
+
+class Deadline:
+    """Срок, до которого должен завершиться цикл опроса.
+
+    Каждый этап (fetch, validate, send) берет таймауты
+    из остатка бюджета, так что зависший сокет не может
+    растянуть цикл дальше срока. Если задан parent, срок
+    не выходит за его срок, даже если тот сократили позже.
+    """
+
+    def __init__(self, budget, connect_timeout=5, clock=time.monotonic,
+                 parent=None):
+        self.clock = clock
+        self.connect_timeout = connect_timeout
+        self.parent = parent
+        self.expires_at = clock() + budget
+
+    def remaining(self):
+        """Сколько секунд осталось до срока."""
+        remaining = self.expires_at - self.clock()
+        if self.parent is not None:
+            remaining = min(remaining, self.parent.remaining())
+        return remaining
+
+    def cap(self, budget):
+        """Сокращаем срок до budget секунд от текущего момента."""
+        self.expires_at = min(self.expires_at, self.clock() + budget)
+
+    def check(self, stage):
+        """Проверяем срок перед этапом и возвращаем остаток."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceededError(
+                f'Истек бюджет времени цикла на этапе {stage}'
+            )
+        return remaining
+
+    def timeout(self, stage):
+        """Пара (connect, read) таймаутов для исходящего вызова."""
+        remaining = self.check(stage)
+        return min(self.connect_timeout, remaining), remaining
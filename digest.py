@@ -0,0 +1,74 @@
+"""Дедупликация и сводки сообщений об ошибках."""
+import re
+import threading
+import time
+
+ERROR_MESSAGE = 'Сбой в работе программы: {error}'
+
+
+def fingerprint(error):
+    """Отпечаток ошибки: класс и текст без чисел."""
+    return f'{type(error).__name__}: {re.sub(r"[0-9]+", "N", str(error))}'
+
+
+class _Entry:
+
+    __slots__ = ('window_start', 'suppressed', 'message')
+
+    def __init__(self, window_start, message):
+        self.window_start = window_start
+        self.suppressed = 0
+        self.message = message
+
+
+class ErrorDigest:
+    """Первую ошибку с данным отпечатком отправляем сразу, повторы копим.
+
+    Раз в window секунд по каждому чату собирается одна сводка
+    с числом подавленных повторов. Если за окно повторов не было,
+    отпечаток забывается и следующая такая ошибка уйдет сразу.
+    """
+
+    def __init__(self, window=3600, clock=time.monotonic):
+        self.window = window
+        self.clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.suppressed = 0
+
+    def record(self, chat_id, error):
+        """Учитываем ошибку; возвращаем текст, если его надо отправить."""
+        key = (chat_id, fingerprint(error))
+        message = ERROR_MESSAGE.format(error=error)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = _Entry(self.clock(), message)
+                return message
+            entry.suppressed += 1
+            entry.message = message
+            self.suppressed += 1
+            return None
+
+    def due(self):
+        """Сводки (chat_id, текст) по чатам, у которых закончилось окно."""
+        now = self.clock()
+        summaries = {}
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if now - entry.window_start < self.window:
+                    continue
+                chat_id, _ = key
+                if not entry.suppressed:
+                    del self._entries[key]
+                    continue
+                summaries.setdefault(chat_id, []).append(
+                    f'{entry.message} (повторов: {entry.suppressed})'
+                )
+                entry.window_start = now
+                entry.suppressed = 0
+        minutes = round(self.window / 60)
+        return [
+            (chat_id, f'Сводка ошибок за {minutes} мин:\n' + '\n'.join(lines))
+            for chat_id, lines in summaries.items()
+        ]
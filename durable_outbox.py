@@ -0,0 +1,339 @@
+"""Персистентная очередь неотправленных сообщений в SQLite.
+
+Сообщение сначала записывается в базу и только потом попадает
+в очередь отправки. Из базы оно удаляется после успешной отправки,
+поэтому при перезапуске недоставленное уходит заново (at-least-once).
+Неудачная отправка повторяется с растущей задержкой; сообщения,
+которые Telegram отклонил или не принял за max_attempts попыток,
+удаляются из базы с записью в лог.
+Ключ идемпотентности не дает поставить одно и то же уведомление
+дважды: ни пока оно ждет отправки, ни в течение delivered_ttl после.
+
+Размер и политика переполнения берутся у Outbox, но действуют
+на уровне журнала. В памяти одновременно не больше maxsize
+сообщений, остальные ждут своей очереди в базе:
+block - put ждет, пока отправители освободят место;
+spill - put не ждет, лишнее остается в базе и досылается
+по мере освобождения места (файл spill_path не используется);
+drop-oldest - сообщение, выброшенное из очереди, удаляется
+и из базы, после перезапуска оно не уйдет.
+"""
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+
+from exceptions import MessageRejectedError
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS messages (
+    key TEXT PRIMARY KEY,
+    chat_id TEXT NOT NULL,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS messages_created_at ON messages (created_at);
+CREATE TABLE IF NOT EXISTS delivered (
+    key TEXT PRIMARY KEY,
+    delivered_at REAL NOT NULL
+);
+'''
+INSERT = '''
+INSERT OR IGNORE INTO messages (key, chat_id, text, created_at)
+SELECT ?, ?, ?, ?
+WHERE NOT EXISTS (SELECT 1 FROM delivered WHERE key = ?)
+'''
+
+
+class DurableOutbox:
+    """SQLite-журнал перед очередью Outbox.
+
+    Вставки и удаления копятся в памяти и пишутся в базу
+    одной транзакцией раз в flush_interval секунд или когда
+    набралось batch_size операций. Раз в refill_interval секунд
+    сообщения, не поместившиеся в очередь, дочитываются из базы.
+    Сообщение, которое не удалось отправить, возвращается в очередь
+    через retry_delay секунд, с каждой попыткой вдвое позже,
+    но не позже max_retry_delay. После max_attempts неудачных
+    попыток или ошибки MessageRejectedError сообщение удаляется.
+    """
+
+    def __init__(self, path, outbox, batch_size=500, flush_interval=0.05,
+                 delivered_ttl=7 * 24 * 60 * 60, refill_interval=1,
+                 retry_delay=5, max_retry_delay=300, max_attempts=10,
+                 clock=time.monotonic):
+        self.outbox = outbox
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.delivered_ttl = delivered_ttl
+        self.refill_interval = refill_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+        self._db_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._inserts = []
+        self._deletes = []
+        self._drops = []
+        self._queued = set()
+        self._attempts = {}
+        self._retry_at = {}
+        self._chats = None
+        self._refilled_at = None
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name='outbox-flusher', daemon=True
+        )
+        self.enqueued = 0
+        self.duplicates = 0
+        self.rejected = 0
+        outbox.on_delivered = self.delivered
+        outbox.on_failed = self.failed
+        outbox.on_dropped = self.dropped
+
+    def start(self, chats=None):
+        """Отправляем то, что осталось с прошлого запуска, и запускаемся.
+
+        Если базу делят несколько процессов, каждый передает
+        chats своих тенантов и досылает только их сообщения.
+        """
+        if chats is not None:
+            self._chats = {str(chat_id) for chat_id in chats}
+        stored = self.stored()
+        if stored:
+            logger.info(f'Недоставленных сообщений с прошлого запуска: '
+                        f'{stored}')
+        self.outbox.start()
+        self.refill()
+        self._flusher.start()
+        return self
+
+    def put(self, chat_id, text, key=None):
+        """Ставим сообщение; повтор ключа игнорируется.
+
+        При политике block ждем, пока в памяти освободится место.
+        """
+        with self._cond:
+            while (
+                self.outbox.policy == self.outbox.BLOCK
+                and not self._stopping
+                and len(self._inserts) + len(self._queued)
+                >= self.outbox.maxsize
+            ):
+                self._cond.wait()
+            self._inserts.append((key or uuid.uuid4().hex, chat_id, text))
+            if len(self._inserts) >= self.batch_size:
+                self._cond.notify_all()
+
+    def delivered(self, key):
+        """Сообщение отправлено, его можно удалить из базы."""
+        with self._cond:
+            self._queued.discard(key)
+            self._attempts.pop(key, None)
+            self._retry_at.pop(key, None)
+            self._deletes.append(key)
+            self._cond.notify_all()
+
+    def failed(self, key, error=None):
+        """Отправка не удалась: откладываем попытку или удаляем сообщение."""
+        with self._cond:
+            self._queued.discard(key)
+            attempts = self._attempts[key] = self._attempts.get(key, 0) + 1
+            dead = (
+                isinstance(error, MessageRejectedError)
+                or attempts >= self.max_attempts
+            )
+            if dead:
+                self._attempts.pop(key)
+                self._retry_at.pop(key, None)
+                self._drops.append(key)
+                self.rejected += 1
+            else:
+                self._retry_at[key] = self.clock() + min(
+                    self.max_retry_delay,
+                    self.retry_delay * 2 ** (attempts - 1)
+                )
+            self._cond.notify_all()
+        if dead:
+            logger.error(f'Сообщение {key} удалено из очереди после '
+                         f'{attempts} попыток: {error}')
+
+    def dropped(self, key):
+        """Сообщение выброшено из очереди, удаляем его без отметки."""
+        with self._cond:
+            self._queued.discard(key)
+            self._attempts.pop(key, None)
+            self._retry_at.pop(key, None)
+            self._drops.append(key)
+            self._cond.notify_all()
+
+    def _room(self):
+        return self.outbox.maxsize - len(self._queued)
+
+    def _forward(self, rows, limit=True):
+        """Передаем строки (key, chat_id, text) в Outbox.
+
+        Если limit, передается не больше, чем есть места,
+        остальное остается в базе до refill.
+        """
+        with self._cond:
+            if limit:
+                rows = rows[:max(0, self._room())]
+            self._queued.update(key for key, _, _ in rows)
+        for key, chat_id, text in rows:
+            self.outbox.put(chat_id, text, key)
+        return len(rows)
+
+    def flush(self):
+        """Пишем накопленные вставки и удаления одной транзакцией."""
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        with self._cond:
+            inserts, self._inserts = self._inserts, []
+            deletes, self._deletes = self._deletes, []
+            drops, self._drops = self._drops, []
+            self._cond.notify_all()
+        if not inserts and not deletes and not drops:
+            return
+        now = time.time()
+        accepted = []
+        with self._db_lock, self._db:
+            for key, chat_id, text in inserts:
+                cursor = self._db.execute(
+                    INSERT, (key, str(chat_id), text, now, key)
+                )
+                if cursor.rowcount:
+                    accepted.append((key, chat_id, text))
+            self._db.executemany(
+                'DELETE FROM messages WHERE key = ?',
+                [(key,) for key in deletes + drops]
+            )
+            self._db.executemany(
+                'INSERT OR REPLACE INTO delivered (key, delivered_at) '
+                'VALUES (?, ?)',
+                [(key, now) for key in deletes]
+            )
+        self.enqueued += len(accepted)
+        self.duplicates += len(inserts) - len(accepted)
+        self._forward(
+            accepted, limit=self.outbox.policy != self.outbox.DROP_OLDEST
+        )
+
+    def refill(self):
+        """Дочитываем в очередь сообщения из базы, которым хватает места.
+
+        Пропускаются сообщения, уже переданные в Outbox, те,
+        чье удаление еще не записано, и те, чей повтор еще
+        не наступил. Возвращает, сколько передано.
+        """
+        with self._flush_lock:
+            now = self._refilled_at = self.clock()
+            with self._cond:
+                room = self._room()
+                skip = self._queued | set(self._deletes) | set(self._drops)
+                skip.update(
+                    key for key, retry_at in self._retry_at.items()
+                    if retry_at > now
+                )
+            if room <= 0:
+                return 0
+            rows = []
+            with self._db_lock:
+                for key, chat_id, text in self._db.execute(
+                    'SELECT key, chat_id, text FROM messages '
+                    'ORDER BY created_at'
+                ):
+                    if key in skip or (
+                        self._chats is not None and chat_id not in self._chats
+                    ):
+                        continue
+                    rows.append((key, chat_id, text))
+                    if len(rows) == room:
+                        break
+            return self._forward(rows)
+
+    def prune(self):
+        """Забываем ключи доставленных сообщений старше delivered_ttl."""
+        with self._db_lock, self._db:
+            self._db.execute(
+                'DELETE FROM delivered WHERE delivered_at < ?',
+                (time.time() - self.delivered_ttl,)
+            )
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                if not self._stopping:
+                    self._cond.wait(self.flush_interval)
+                stopping = self._stopping
+            try:
+                self.flush()
+                if self.clock() - self._refilled_at >= self.refill_interval:
+                    self.refill()
+            except sqlite3.Error as error:
+                logger.error(f'Не удалось записать очередь сообщений: '
+                             f'{error}')
+            if stopping:
+                return
+
+    def stored(self):
+        """Сколько сообщений ждет доставки по данным базы."""
+        with self._db_lock:
+            return self._db.execute(
+                'SELECT COUNT(*) FROM messages'
+            ).fetchone()[0]
+
+    def stats(self):
+        """Метрики очереди вместе с журналом."""
+        with self._cond:
+            pending = (
+                len(self._inserts) + len(self._deletes) + len(self._drops)
+            )
+            queued = len(self._queued)
+            retrying = len(self._retry_at)
+        return {
+            **self.outbox.stats(),
+            'pending_writes': pending,
+            'queued': queued,
+            'retrying': retrying,
+            'enqueued': self.enqueued,
+            'duplicates': self.duplicates,
+            'rejected': self.rejected,
+        }
+
+    def stop(self, timeout=None):
+        """Досылаем очередь, сбрасываем журнал и закрываем базу.
+
+        timeout делится между досылкой очереди и последней записью
+        журнала. Что не успело уйти, остается в базе и будет
+        отправлено после перезапуска.
+        """
+        finish = None if timeout is None else time.monotonic() + timeout
+
+        def remaining():
+            return None if finish is None else max(
+                0, finish - time.monotonic()
+            )
+
+        self.flush()
+        drained = self.outbox.stop(remaining())
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._flusher.is_alive():
+            self._flusher.join(remaining())
+        self.prune()
+        with self._db_lock:
+            self._db.close()
+        return drained
@@ -18,6 +18,42 @@ class HTTPStatusError(Exception):
     pass
 
 
+class RequestRejectedError(Exception):
+    """API отклонил запрос (4xx), повтор не поможет."""
+    pass
+
+
 class TelegrammError(Exception):
     """Сообщение не отправлено"""
     pass
+
+
+class MessageRejectedError(TelegrammError):
+    """Telegram отклонил сообщение (бот заблокирован, чат не найден).
+
+    Повтор отправки не поможет.
+    """
+    pass
+
+
+class CircuitOpenError(NotSendException):
+    """Запросы к API временно остановлены автоматом-предохранителем."""
+    pass
+
+
+class ShutdownError(NotSendException):
+    """Бот останавливается, ожидание прервано."""
+    pass
+
+
+class DeadlineExceededError(Exception):
+    """Истек бюджет времени на цикл опроса."""
+    pass
+
+
+class RetryAfterError(TelegrammError):
+    """Telegram просит подождать перед следующей отправкой."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
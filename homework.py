@@ -1,28 +1,125 @@
+import argparse
 import logging
 import os
 import json
+import signal
 import sys
+import threading
 import time
+from functools import partial
 from http import HTTPStatus
 
-import requests
 import telegram
 from dotenv import load_dotenv
 from telegram import Bot
+from telegram.utils.request import Request
 
-from exceptions import (EmptyResponseError, HTTPStatusError, ResponseError,
+from cache import ResponseCache
+from checkpoint import CheckpointStore
+from commands import CHECK_REPLY, CommandListener
+from deadline import Deadline
+from digest import ErrorDigest
+from durable_outbox import DurableOutbox
+from exceptions import (EmptyResponseError, HTTPStatusError,
+                        MessageRejectedError, NotSendException,
+                        ResponseError, RetryAfterError, ShutdownError,
                         TelegrammError)
+from jsondecode import get_decoder
+from metrics import METRICS
+from outbox import Outbox
+from polling import AdaptiveInterval
+from ratelimit import FileBucketStore, MemoryBucketStore, RateLimiter
+from records import Homework
+from retry import CircuitBreaker, RetryPolicy, status_error
+from state import StateCache, StateStore
+from singleflight import SingleFlight
+from stream import HomeworkStream
+from tenants import Tenant, TenantScheduler, load_tenants
+from transport import ApiTransport
+from wakeup import Wakeup
 
 load_dotenv()
 
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+TENANTS_FILE = os.getenv('TENANTS_FILE')
+STATE_DIR = os.getenv('STATE_DIR', 'state')
+STATES = StateCache(
+    StateStore(STATE_DIR),
+    max_entries=int(os.getenv('STATE_CACHE_ENTRIES', 100_000))
+)
+CHECKPOINTS = CheckpointStore(
+    os.getenv('CHECKPOINT_FILE', 'checkpoints.json'),
+    flush_interval=float(os.getenv('CHECKPOINT_INTERVAL', 5))
+)
 
 RETRY_TIME = 600
+POLL_MIN_INTERVAL = int(os.getenv('POLL_MIN_INTERVAL', 60))
+POLL_MAX_INTERVAL = int(os.getenv('POLL_MAX_INTERVAL', 3600))
+REVIEWING_INTERVAL = int(os.getenv('REVIEWING_INTERVAL', 120))
+IDLE_AFTER = int(os.getenv('IDLE_AFTER', 3 * 60 * 60))
+POLL_JITTER = float(os.getenv('POLL_JITTER', 10))
+POLL_INTERVAL = AdaptiveInterval(
+    base=RETRY_TIME,
+    minimum=POLL_MIN_INTERVAL,
+    maximum=POLL_MAX_INTERVAL,
+    reviewing=REVIEWING_INTERVAL,
+    idle_after=IDLE_AFTER
+)
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
 
+POOL_CONNECTIONS = int(os.getenv('POOL_CONNECTIONS', 1))
+POOL_MAXSIZE = int(os.getenv('POOL_MAXSIZE', 10))
+MAX_WORKERS = int(os.getenv('MAX_WORKERS', 10))
+CONNECT_TIMEOUT = float(os.getenv('CONNECT_TIMEOUT', 5))
+READ_TIMEOUT = float(os.getenv('READ_TIMEOUT', 30))
+CYCLE_BUDGET = float(os.getenv('CYCLE_BUDGET', 60))
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', 20))
+SHUTDOWN = threading.Event()
+SHUTDOWN_DEADLINE = Deadline(float('inf'))
+WAKEUP = Wakeup()
+LISTEN_COMMANDS = int(os.getenv('LISTEN_COMMANDS', 1))
+DECODE_JSON = get_decoder(os.getenv('JSON_BACKEND', 'auto'))
+STREAM_CHUNK_SIZE = 64 * 1024
+OUTBOX_SIZE = int(os.getenv('OUTBOX_SIZE', 1000))
+OUTBOX_POLICY = os.getenv('OUTBOX_POLICY', Outbox.BLOCK)
+OUTBOX_SPILL_FILE = os.getenv('OUTBOX_SPILL_FILE', 'outbox.spill')
+OUTBOX_DB = os.getenv('OUTBOX_DB', 'outbox.sqlite3')
+SENDER_WORKERS = int(os.getenv('SENDER_WORKERS', 2))
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+ERROR_DIGEST = ErrorDigest(
+    window=float(os.getenv('ERROR_DIGEST_WINDOW', 60 * 60))
+)
+TRANSPORT = ApiTransport(
+    pool_connections=POOL_CONNECTIONS,
+    pool_maxsize=POOL_MAXSIZE
+)
+RESPONSE_CACHE = ResponseCache()
+API_FLIGHTS = SingleFlight()
+RATE_LIMIT_FILE = os.getenv('RATE_LIMIT_FILE')
+API_LIMITER = RateLimiter(
+    store=(FileBucketStore(RATE_LIMIT_FILE) if RATE_LIMIT_FILE
+           else MemoryBucketStore()),
+    global_rate=float(os.getenv('API_RATE', 10)),
+    global_burst=float(os.getenv('API_BURST', 20)),
+    token_rate=float(os.getenv('TOKEN_RATE', 0.2)),
+    token_burst=float(os.getenv('TOKEN_BURST', 3)),
+    sleep=lambda delay: pause(delay)
+)
+API_RETRY = RetryPolicy(
+    attempts=int(os.getenv('RETRY_ATTEMPTS', 3)),
+    base_delay=float(os.getenv('RETRY_BASE_DELAY', 1)),
+    max_delay=float(os.getenv('RETRY_MAX_DELAY', 30)),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.getenv('BREAKER_FAILURES', 5)),
+        recovery_timeout=float(os.getenv('BREAKER_RECOVERY', 60))
+    ),
+    sleep=lambda delay: pause(delay)
+)
+
 HOMEWORK_VERDICTS = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
     'reviewing': 'Работа взята на проверку ревьюером.',
@@ -51,25 +148,60 @@ logger = init_logger()
 
 def send_message(bot, message):
     """Отправка сообщения в Telegram чат."""
+    send_to_chat(bot, TELEGRAM_CHAT_ID, message)
+
+
+def send_to_chat(bot, chat_id, message, deadline=None):
+    """Отправка сообщения в указанный Telegram чат.
+
+    С deadline таймаут чтения берется из остатка бюджета цикла,
+    иначе действуют таймауты Request, с которыми создан бот.
+    """
+    timeout = None
+    if deadline is not None:
+        _, timeout = deadline.timeout('send')
     try:
         logging.info('Отправляем сообщение.')
-        bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
+        bot.send_message(chat_id=chat_id, text=message, timeout=timeout)
+    except telegram.error.RetryAfter as error:
+        raise RetryAfterError(f'Telegram ограничил частоту отправки: '
+                              f'{error}', error.retry_after)
+    except (telegram.error.Unauthorized, telegram.error.BadRequest) as error:
+        raise MessageRejectedError(f'Telegram отклонил сообщение '
+                                   f'в чат {chat_id}: {error}')
     except telegram.error.TelegramError as error:
         raise TelegrammError(f'Не отправилось сообщение '
                              f'в Телеграм, ошибка {error}')
 
 
+def request_statuses(current_timestamp, headers=None, deadline=None,
+                     stream=False):
+    """Отправляем запрос к API и возвращаем ответ без разбора.
+
+    С stream=True тело ответа не загружается сразу
+    и читается кусками через iter_content.
+    """
+    if current_timestamp is None:
+        current_timestamp = int(time.time())
+    params = {'from_date': current_timestamp}
+    if deadline is None:
+        timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    else:
+        timeout = deadline.timeout('fetch')
+    logger.info('Отправляем запрос к API.')
+    return TRANSPORT.get(
+        ENDPOINT,
+        headers=headers or HEADERS,
+        params=params,
+        timeout=timeout,
+        stream=stream
+    )
+
+
 def get_api_answer(current_timestamp):
     """Возвращает ответ API в случае успешного запроса."""
-    timestamp = current_timestamp or int(time.time())
-    params = {'from_date': timestamp}
     try:
-        logger.info('Отправляем запрос к API.')
-        homework_statuses = requests.get(
-            ENDPOINT,
-            headers=HEADERS,
-            params=params
-        )
+        homework_statuses = request_statuses(current_timestamp)
         if homework_statuses.status_code != HTTPStatus.OK:
             raise HTTPStatusError('Пришел отличный от 200 статус.')
         return homework_statuses.json()
@@ -80,6 +212,87 @@ def get_api_answer(current_timestamp):
         send_message('Ответ сервера не преобразуется в json')
 
 
+def request_checked(current_timestamp, headers, deadline=None,
+                    stream=False):
+    """Запрос к API, ошибка на любой статус кроме 200 и 304 (см. status_error).
+
+    Перед запросом ждем жетон у общего ограничителя частоты.
+    """
+    API_LIMITER.acquire(headers.get('Authorization'), deadline)
+    homework_statuses = request_statuses(
+        current_timestamp, headers, deadline, stream
+    )
+    if homework_statuses.status_code not in (
+        HTTPStatus.OK, HTTPStatus.NOT_MODIFIED
+    ):
+        raise status_error(homework_statuses.status_code)
+    return homework_statuses
+
+
+def fetch_homeworks(current_timestamp, tenant=None, deadline=None):
+    """Возвращает ответ API и проверенный список домашек.
+
+    Одновременные запросы с тем же токеном и курсором
+    объединяются в один HTTP-запрос.
+    """
+    timestamp = current_timestamp or int(time.time())
+    token = tenant.practicum_token if tenant else PRACTICUM_TOKEN
+    return API_FLIGHTS.do(
+        (token, timestamp), load_homeworks, timestamp, tenant, deadline
+    )
+
+
+def load_homeworks(timestamp, tenant=None, deadline=None):
+    """Запрашиваем и проверяем домашки.
+
+    Запрос условный: на 304 Not Modified берем ответ из кэша,
+    не декодируя json и не вызывая check_response повторно.
+    """
+    token = tenant.practicum_token if tenant else PRACTICUM_TOKEN
+    headers = {
+        **(tenant.headers if tenant else HEADERS),
+        **RESPONSE_CACHE.conditional_headers(token, timestamp)
+    }
+    homework_statuses = API_RETRY.call(
+        request_checked, timestamp, headers, deadline, deadline=deadline
+    )
+    if homework_statuses.status_code == HTTPStatus.NOT_MODIFIED:
+        entry = RESPONSE_CACHE.hit(token, timestamp)
+        if entry is None:
+            raise HTTPStatusError('Пришел 304 без сохраненного ответа.')
+        logger.info('Ответ API не изменился')
+        return entry.response, entry.homeworks
+    response = DECODE_JSON(homework_statuses.content)
+    if deadline is not None:
+        deadline.check('validate')
+    homeworks = [
+        Homework.from_dict(item) for item in check_response(response)
+    ]
+    response = {'current_date': response['current_date']}
+    RESPONSE_CACHE.store(
+        token, timestamp, homework_statuses.headers,
+        response, homeworks
+    )
+    return response, homeworks
+
+
+def stream_homeworks(current_timestamp, tenant=None, deadline=None):
+    """Потоковый запрос к API: домашки отдаются по одной.
+
+    Нужен для длинной истории (from_date=0), которую не стоит
+    целиком держать в памяти. Поток закрывается через with.
+    """
+    headers = tenant.headers if tenant else HEADERS
+    homework_statuses = API_RETRY.call(
+        request_checked, current_timestamp, headers, deadline, True,
+        deadline=deadline
+    )
+    return HomeworkStream(
+        homework_statuses.iter_content(STREAM_CHUNK_SIZE),
+        close=homework_statuses.close
+    )
+
+
 def check_response(response):
     """Начинаем проверку корректности ответа API."""
     logger.info('Начинаем проверку корректности ответа API.')
@@ -98,11 +311,11 @@ def check_response(response):
 
 
 def parse_status(homework):
-    """Получаем статус домашки."""
-    homework_name = homework.get('homework_name')
-    homework_status = homework.get('status')
-    if 'homework_name' not in homework:
-        raise KeyError(f'Ключ "homework_name" отсутствует в {homework}')
+    """Получаем статус домашки из записи Homework или словаря."""
+    if not isinstance(homework, Homework):
+        homework = Homework.from_dict(homework)
+    homework_name = homework.name
+    homework_status = homework.status
     if homework_status not in HOMEWORK_VERDICTS:
         raise ValueError(f'Статус {homework_status} отсутствует в вердикте')
     verdict = HOMEWORK_VERDICTS[homework_status]
@@ -115,10 +328,55 @@ def check_tokens():
     return all((PRACTICUM_TOKEN, TELEGRAM_TOKEN, TELEGRAM_CHAT_ID))
 
 
-def main():
-    """Основная логика работы бота."""
-    bot = Bot(token=TELEGRAM_TOKEN)
-    if not check_tokens():
+def load_registry():
+    """Тенанты из TENANTS_FILE или один тенант из переменных окружения.
+
+    Курсор каждого тенанта восстанавливается из CHECKPOINTS.
+    """
+    current_timestamp = int(time.time())
+    if TENANTS_FILE:
+        tenants = load_tenants(TENANTS_FILE, current_timestamp)
+    else:
+        tenants = [Tenant('default', PRACTICUM_TOKEN, TELEGRAM_CHAT_ID,
+                          current_timestamp)]
+    CHECKPOINTS.load()
+    for tenant in tenants:
+        tenant.current_timestamp = CHECKPOINTS.get(
+            tenant.name, tenant.current_timestamp
+        )
+    return tenants
+
+
+def make_bot():
+    """Бот с пулом соединений на всех отправителей очереди."""
+    return Bot(token=TELEGRAM_TOKEN, request=Request(
+        con_pool_size=SENDER_WORKERS + 4,
+        connect_timeout=CONNECT_TIMEOUT,
+        read_timeout=READ_TIMEOUT
+    ))
+
+
+def make_outbox(bot):
+    """Очередь отправки в Telegram с лимитами и политикой из окружения."""
+    return Outbox(
+        partial(send_to_chat, bot),
+        maxsize=OUTBOX_SIZE,
+        workers=SENDER_WORKERS,
+        policy=OUTBOX_POLICY,
+        spill_path=OUTBOX_SPILL_FILE,
+        global_rate=TELEGRAM_GLOBAL_RATE,
+        chat_rate=TELEGRAM_CHAT_RATE
+    )
+
+
+def main(tenants=None):
+    """Основная логика работы бота.
+
+    tenants передает супервизор: процесс опрашивает только их
+    и досылает из общей очереди только сообщения их чатов.
+    """
+    bot = make_bot()
+    if not TENANTS_FILE and not check_tokens():
         no_tokens = (
             'Отсутствует одна из переменных окружения: '
             'PRACTICUM_TOKEN, '
@@ -127,23 +385,216 @@ def main():
 
         logging.critical(no_tokens)
     logging.debug('Бот включен')
-    current_timestamp = int(time.time())
-    while True:
+    chats = None
+    if tenants is None:
+        tenants = load_registry()
+    else:
+        chats = [tenant.chat_id for tenant in tenants]
+    outbox = DurableOutbox(OUTBOX_DB, make_outbox(bot)).start(chats)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, request_shutdown)
+    signal.signal(signal.SIGUSR1, request_check)
+    listener = None
+    if LISTEN_COMMANDS:
+        listener = CommandListener(
+            bot, partial(check_requested, outbox),
+            [tenant.chat_id for tenant in tenants]
+        ).start()
+    TRANSPORT.open()
+    try:
+        poll_forever(outbox, tenants)
+    finally:
+        if listener is not None:
+            listener.stop()
+        TRANSPORT.close()
+        logging.debug('Сессия API закрыта')
+        CHECKPOINTS.flush(force=True)
+        STATES.flush()
+        SHUTDOWN_DEADLINE.cap(SHUTDOWN_TIMEOUT)
+        outbox.stop(max(0, SHUTDOWN_DEADLINE.remaining()))
+        logging.info('Бот остановлен')
+
+
+def request_shutdown(signum, frame):
+    """Обработчик SIGTERM/SIGINT: завершаем работу после текущего цикла.
+
+    С этого момента на все остается SHUTDOWN_TIMEOUT секунд:
+    начатые опросы, ожидания повторов и лимитов и досылка очереди.
+    """
+    logging.info(f'Получен сигнал {signal.Signals(signum).name}, '
+                 f'завершаем работу')
+    SHUTDOWN_DEADLINE.cap(SHUTDOWN_TIMEOUT)
+    SHUTDOWN.set()
+    WAKEUP.wake()
+
+
+def pause(delay):
+    """Пауза перед повтором или жетоном лимита.
+
+    Если за время паузы пришел сигнал остановки, ожидание
+    прерывается ShutdownError, и цикл повторов не продолжается.
+    """
+    if SHUTDOWN.wait(delay):
+        raise ShutdownError('Бот останавливается, ожидание прервано')
+
+
+def request_check(signum, frame):
+    """Обработчик SIGUSR1: немедленно опрашиваем всех тенантов."""
+    logging.info('Получен SIGUSR1, опрашиваем всех тенантов')
+    WAKEUP.request_check()
+
+
+def check_requested(outbox, chat_id):
+    """Команда /check из чата: отвечаем и будим цикл опроса."""
+    outbox.put(chat_id, CHECK_REPLY)
+    WAKEUP.request_check(chat_id)
+
+
+def notification_key(tenant, homework):
+    """Ключ идемпотентности уведомления о статусе домашки."""
+    return ':'.join((
+        str(tenant.name), homework.key,
+        str(homework.status), str(homework.date_updated)
+    ))
+
+
+def next_cursor(tenant, response, homeworks):
+    """Курсор from_date для следующего опроса тенанта.
+
+    Пока новых домашек нет, курсор не двигается: запрос повторяется
+    с тем же from_date, и RESPONSE_CACHE получает 304 по ETag.
+    Старый курсор безопасен - ответ для него только шире.
+    """
+    if not homeworks and tenant.current_timestamp is not None:
+        return tenant.current_timestamp
+    return response.get('current_date', tenant.current_timestamp)
+
+
+def poll_tenant(outbox, tenant):
+    """Один цикл опроса тенанта, статус уходит в очередь сообщений."""
+    if SHUTDOWN.is_set():
+        return
+    deadline = Deadline(
+        CYCLE_BUDGET, CONNECT_TIMEOUT, parent=SHUTDOWN_DEADLINE
+    )
+    try:
+        response, homeworks = fetch_homeworks(
+            tenant.current_timestamp, tenant, deadline
+        )
+        state = STATES.get(tenant.name)
+        changed = state.diff(homeworks)
         try:
-            response = get_api_answer(current_timestamp)
-            homework = check_response(response)
-            if len(response['homeworks']) > 0:
-                homework = response['homeworks'][0]
-                send_message(bot, parse_status(homework))
-                logging.info('Сообщение отправлено')
-            current_timestamp = response.get('current_date', current_timestamp)
-
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-            logging.error(message)
-            send_message(bot, message)
+            for homework in changed:
+                outbox.put(
+                    tenant.chat_id, parse_status(homework),
+                    notification_key(tenant, homework)
+                )
+                state.update(homework)
+                logging.info('Сообщение поставлено в очередь')
         finally:
-            time.sleep(RETRY_TIME)
+            if changed:
+                STATES.put(tenant.name, state)
+        tenant.current_timestamp = next_cursor(tenant, response, homeworks)
+        CHECKPOINTS.update(tenant.name, tenant.current_timestamp)
+        POLL_INTERVAL.observe(
+            tenant, homeworks, time.time(), state.statuses.values()
+        )
+
+    except NotSendException as error:
+        tenant.next_poll_at = time.time() + max(
+            API_RETRY.breaker.seconds_until_retry(),
+            tenant.interval or RETRY_TIME
+        )
+        logging.warning(error)
+    except Exception as error:
+        tenant.next_poll_at = time.time() + (tenant.interval or RETRY_TIME)
+        logging.error(f'Сбой в работе программы: {error}')
+        message = ERROR_DIGEST.record(tenant.chat_id, error)
+        if message is not None:
+            outbox.put(tenant.chat_id, message)
+
+
+def send_error_digests(outbox):
+    """Ставим в очередь сводки по повторяющимся ошибкам."""
+    for chat_id, summary in ERROR_DIGEST.due():
+        outbox.put(chat_id, summary)
+
+
+def report_metrics(tenants, outbox):
+    """Обновляем и логируем метрики бота."""
+    METRICS.set('expected_calls_per_day',
+                POLL_INTERVAL.calls_per_day(tenants))
+    METRICS.set('response_cache', RESPONSE_CACHE.stats())
+    METRICS.set('coalesced_api_calls', API_FLIGHTS.shared)
+    METRICS.set('outbox', outbox.stats())
+    METRICS.set('suppressed_errors', ERROR_DIGEST.suppressed)
+    METRICS.set('checkpoint_writes', CHECKPOINTS.writes)
+    METRICS.set('state_cache', STATES.stats())
+    logging.debug(f'Метрики: {METRICS.snapshot()}')
+
+
+def poll_forever(outbox, tenants):
+    """Цикл опроса API для всех тенантов до сигнала SHUTDOWN.
+
+    Опросы идут в пуле независимо, цикл только раздает тех,
+    кому пора. Между раздачами ждем на WAKEUP: его будит
+    окончание опроса и запрошенная проверка, которая начинается
+    сразу, а не по расписанию. Начатые опросы
+    дорабатываются в пределах CYCLE_BUDGET, но не дольше
+    SHUTDOWN_DEADLINE; еще не начатые при остановке пропускаются.
+    """
+    by_chat = {}
+    for tenant in tenants:
+        by_chat.setdefault(str(tenant.chat_id), []).append(tenant)
+    with TenantScheduler(
+        tenants, partial(poll_tenant, outbox), MAX_WORKERS, POLL_JITTER,
+        on_rescheduled=WAKEUP.wake
+    ) as scheduler:
+        while not SHUTDOWN.is_set():
+            scheduler.dispatch(time.time())
+            send_error_digests(outbox)
+            report_metrics(tenants, outbox)
+            CHECKPOINTS.flush()
+            delay = scheduler.seconds_until_next(time.time())
+            if delay is None:
+                delay = RETRY_TIME
+            checks = WAKEUP.wait(min(delay, ERROR_DIGEST.window))
+            forced = tenants if Wakeup.ALL in checks else [
+                tenant for chat_id in checks
+                for tenant in by_chat.get(chat_id, ())
+            ]
+            for tenant in forced:
+                scheduler.schedule(tenant, 0, jitter=False)
+    logging.info('Опрос API остановлен')
+
+
+def parse_args():
+    """Разбираем аргументы командной строки."""
+    parser = argparse.ArgumentParser(description='Бот статусов домашек.')
+    parser.add_argument(
+        '--engine',
+        choices=('sync', 'async'),
+        default='sync',
+        help='движок опроса: блокирующий цикл или asyncio'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=int(os.getenv('WORKERS', 1)),
+        help='число процессов-воркеров, между которыми делятся тенанты'
+    )
+    parser.add_argument(
+        '--backfill',
+        action='store_true',
+        help='загрузить историю домашек без отправки сообщений'
+    )
+    parser.add_argument(
+        '--since',
+        type=int,
+        default=0,
+        help='с какого timestamp загружать историю при --backfill'
+    )
+    return parser.parse_args()
 
 
 if __name__ == '__main__':
@@ -156,4 +607,15 @@ if __name__ == '__main__':
     logger = logging.getLogger(__name__)
     handler = logging.StreamHandler()
     logger.addHandler(handler)
-    main()
+    args = parse_args()
+    if args.backfill:
+        import backfill
+        backfill.main(args.since)
+    elif args.workers > 1:
+        import supervisor
+        supervisor.main(args.workers, args.engine)
+    elif args.engine == 'async':
+        import async_engine
+        async_engine.main()
+    else:
+        main()
@@ -0,0 +1,28 @@
+"""Декодирование json-ответов API с выбором быстрого бэкенда.
+
+Если установлен orjson, используем его, иначе стандартный json.
+orjson.JSONDecodeError наследуется от json.JSONDecodeError,
+поэтому обработка ошибок разбора одинакова для обоих бэкендов.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKENDS = {'json': json.loads}
+if orjson is not None:
+    BACKENDS['orjson'] = orjson.loads
+
+
+def get_decoder(name='auto'):
+    """Функция разбора json для бэкенда name.
+
+    auto выбирает orjson, если он установлен.
+    """
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'json'
+    if name not in BACKENDS:
+        raise ValueError(f'json-бэкенд {name} недоступен')
+    return BACKENDS[name]
@@ -0,0 +1,28 @@
+"""Реестр метрик бота."""
+import threading
+
+
+class Metrics:
+    """Потокобезопасный набор именованных счетчиков и датчиков."""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, name, value):
+        """Устанавливаем значение датчика."""
+        with self._lock:
+            self._values[name] = value
+
+    def increment(self, name, value=1):
+        """Увеличиваем счетчик."""
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + value
+
+    def snapshot(self):
+        """Копия текущих значений всех метрик."""
+        with self._lock:
+            return dict(self._values)
+
+
+METRICS = Metrics()
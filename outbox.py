@@ -0,0 +1,274 @@
+"""Очередь исходящих сообщений Telegram с отдельными отправителями."""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from itertools import count
+
+from exceptions import RetryAfterError
+from ratelimit import GLOBAL_BUCKET, MemoryBucketStore
+
+logger = logging.getLogger(__name__)
+
+
+class Outbox:
+    """Ограниченная очередь сообщений и пул потоков-отправителей.
+
+    Опрос API кладет сообщения в очередь и сразу идет дальше,
+    а отправители доставляют их независимо. Если очередь полна,
+    действует политика policy:
+    block - ждать свободного места,
+    drop-oldest - выбросить самое старое сообщение,
+    spill - дописать сообщение в файл spill_path; отправители
+    дочитают его, когда очередь опустеет.
+
+    Отправка укладывается в лимиты Telegram: общий global_rate
+    сообщений в секунду на бота и chat_rate на чат. Чаты
+    обслуживаются по кругу, в один чат одновременно уходит
+    не больше одного сообщения. На RetryAfter отправка
+    приостанавливается на запрошенное время.
+
+    У сообщения может быть ключ key; после успешной отправки
+    он передается в on_delivered, при ошибке отправки вместе
+    с исключением - в on_failed,
+    а если сообщение выброшено политикой drop-oldest - в on_dropped.
+    """
+
+    BLOCK = 'block'
+    DROP_OLDEST = 'drop-oldest'
+    SPILL = 'spill'
+    POLICIES = (BLOCK, DROP_OLDEST, SPILL)
+
+    def __init__(self, send, maxsize=1000, workers=2, policy=BLOCK,
+                 spill_path=None, global_rate=30, chat_rate=1,
+                 clock=time.monotonic, on_delivered=None, on_failed=None,
+                 on_dropped=None):
+        if policy not in self.POLICIES:
+            raise ValueError(f'Неизвестная политика очереди: {policy}')
+        if policy == self.SPILL and not spill_path:
+            raise ValueError('Для политики spill нужен spill_path')
+        self.send = send
+        self.on_delivered = on_delivered
+        self.on_failed = on_failed
+        self.on_dropped = on_dropped
+        self.maxsize = maxsize
+        self.policy = policy
+        self.spill_path = spill_path
+        self.global_rate = global_rate
+        self.chat_rate = chat_rate
+        self.clock = clock
+        self._buckets = MemoryBucketStore(clock)
+        self._chats = {}
+        self._ready = deque()
+        self._busy = set()
+        self._size = 0
+        self._sequence = count()
+        self._paused_until = 0
+        self._cond = threading.Condition()
+        self._threads = [
+            threading.Thread(
+                target=self._work, name=f'sender-{index}', daemon=True
+            )
+            for index in range(workers)
+        ]
+        self._stopping = False
+        self._spilled = 0
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self.throttled = 0
+
+    def start(self):
+        """Запускаем отправителей."""
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def put(self, chat_id, text, key=None):
+        """Ставим сообщение в очередь с учетом политики переполнения."""
+        with self._cond:
+            while self._size >= self.maxsize:
+                if self.policy == self.DROP_OLDEST:
+                    self._drop_oldest()
+                elif self.policy == self.SPILL:
+                    self._spill((chat_id, text, key))
+                    return
+                else:
+                    self._cond.wait()
+            self._append(chat_id, text, key)
+            self._cond.notify_all()
+
+    def _append(self, chat_id, text, key=None, first=False):
+        messages = self._chats.get(chat_id)
+        if messages is None:
+            messages = self._chats[chat_id] = deque()
+            self._ready.append(chat_id)
+        if first:
+            messages.appendleft((-1, text, key))
+        else:
+            messages.append((next(self._sequence), text, key))
+        self._size += 1
+
+    def _remove_head(self, chat_id):
+        messages = self._chats[chat_id]
+        _, text, key = messages.popleft()
+        self._size -= 1
+        if not messages:
+            del self._chats[chat_id]
+            self._ready.remove(chat_id)
+        return text, key
+
+    def _drop_oldest(self):
+        chat_id = min(self._chats, key=lambda chat: self._chats[chat][0][0])
+        _, key = self._remove_head(chat_id)
+        self.dropped += 1
+        if key is not None and self.on_dropped is not None:
+            self.on_dropped(key)
+        logger.warning('Очередь сообщений полна, '
+                       'старое сообщение выброшено')
+
+    def _spill(self, message):
+        with open(self.spill_path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(message, ensure_ascii=False) + '\n')
+        self._spilled += 1
+
+    def _unspill(self):
+        with open(self.spill_path, encoding='utf-8') as file:
+            lines = file.readlines()
+        room = self.maxsize - self._size
+        for line in lines[:room]:
+            self._append(*json.loads(line))
+        rest = lines[room:]
+        if rest:
+            with open(self.spill_path, 'w', encoding='utf-8') as file:
+                file.writelines(rest)
+        else:
+            os.remove(self.spill_path)
+        self._spilled = len(rest)
+
+    def _buckets_for(self, chat_id):
+        return [
+            (GLOBAL_BUCKET, self.global_rate, self.global_rate),
+            (f'chat:{chat_id}', self.chat_rate, 1),
+        ]
+
+    def _pick(self):
+        """Следующий чат по кругу, которому можно отправить сейчас.
+
+        Возвращает (chat_id, None) или (None, сколько ждать).
+        """
+        wait = None
+        for _ in range(len(self._ready)):
+            chat_id = self._ready[0]
+            self._ready.rotate(-1)
+            if chat_id in self._busy:
+                continue
+            delay = self._buckets.take(self._buckets_for(chat_id))
+            if not delay:
+                return chat_id, None
+            wait = delay if wait is None else min(wait, delay)
+        return None, wait
+
+    def _next(self):
+        with self._cond:
+            while True:
+                if not self._size:
+                    if self._spilled:
+                        self._unspill()
+                    elif self._stopping:
+                        return None
+                    else:
+                        self._cond.wait()
+                    continue
+                pause = self._paused_until - self.clock()
+                if pause > 0:
+                    self._cond.wait(pause)
+                    continue
+                chat_id, wait = self._pick()
+                if chat_id is None:
+                    self._cond.wait(wait)
+                    continue
+                text, key = self._remove_head(chat_id)
+                self._busy.add(chat_id)
+                self._cond.notify_all()
+                return chat_id, text, key
+
+    def _deliver(self, chat_id, text, key):
+        try:
+            self.send(chat_id, text)
+        except RetryAfterError as error:
+            logger.warning(f'Telegram просит подождать '
+                           f'{error.retry_after} с')
+            with self._cond:
+                self.throttled += 1
+                self._paused_until = max(
+                    self._paused_until, self.clock() + error.retry_after
+                )
+                self._append(chat_id, text, key, first=True)
+        except Exception as error:
+            logger.error(f'Сообщение в чат {chat_id} '
+                         f'не доставлено: {error}')
+            with self._cond:
+                self.failed += 1
+            if key is not None and self.on_failed is not None:
+                self.on_failed(key, error)
+        else:
+            with self._cond:
+                self.sent += 1
+            if key is not None and self.on_delivered is not None:
+                self.on_delivered(key)
+
+    def _work(self):
+        while True:
+            message = self._next()
+            if message is None:
+                return
+            chat_id, text, key = message
+            try:
+                self._deliver(chat_id, text, key)
+            finally:
+                with self._cond:
+                    self._busy.discard(chat_id)
+                    self._cond.notify_all()
+
+    def depth(self):
+        """Сколько сообщений ждет отправки."""
+        with self._cond:
+            return self._size + self._spilled
+
+    def stats(self):
+        """Метрики очереди."""
+        with self._cond:
+            return {
+                'depth': self._size,
+                'chats': len(self._chats),
+                'spilled': self._spilled,
+                'in_flight': len(self._busy),
+                'sent': self.sent,
+                'failed': self.failed,
+                'dropped': self.dropped,
+                'throttled': self.throttled,
+            }
+
+    def stop(self, timeout=None):
+        """Дожидаемся отправки очереди и останавливаем отправителей.
+
+        timeout ограничивает ожидание всех отправителей вместе;
+        возвращает True, если очередь успела опустеть.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        finish = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            if thread.is_alive():
+                thread.join(
+                    None if finish is None
+                    else max(0, finish - time.monotonic())
+                )
+        drained = not any(thread.is_alive() for thread in self._threads)
+        if not drained:
+            logger.warning(f'Не доставлено к остановке: {self.depth()}')
+        return drained
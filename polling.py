@@ -0,0 +1,57 @@
+"""Адаптивный интервал опроса API."""
+SECONDS_PER_DAY = 24 * 60 * 60
+REVIEWING = 'reviewing'
+
+
+class AdaptiveInterval:
+    """Подбирает интервал опроса тенанта по статусу его домашки.
+
+    Пока хоть одна работа на ревью, опрашиваем часто. Если изменений нет
+    дольше idle_after секунд, интервал растет геометрически.
+    Результат всегда укладывается в [minimum, maximum].
+    """
+
+    def __init__(self, base, minimum, maximum, reviewing, idle_after,
+                 factor=2):
+        self.base = base
+        self.minimum = minimum
+        self.maximum = maximum
+        self.reviewing = reviewing
+        self.idle_after = idle_after
+        self.factor = factor
+
+    def clamp(self, interval):
+        """Ограничиваем интервал рамками [minimum, maximum]."""
+        return max(self.minimum, min(self.maximum, interval))
+
+    def observe(self, tenant, homeworks, now, known=()):
+        """Учитываем ответ API и назначаем тенанту следующий опрос.
+
+        known - статусы всех домашек тенанта из его состояния:
+        в ответе с курсором приходят только изменившиеся домашки.
+        """
+        if tenant.last_change_at is None:
+            tenant.last_change_at = now
+        if len(homeworks) > 0:
+            tenant.last_change_at = now
+        statuses = [homework.status for homework in homeworks] + list(known)
+        if statuses:
+            tenant.last_status = (
+                REVIEWING if REVIEWING in statuses else statuses[0]
+            )
+        if tenant.last_status == REVIEWING:
+            interval = self.reviewing
+        elif now - tenant.last_change_at < self.idle_after:
+            interval = self.base
+        else:
+            interval = (tenant.interval or self.base) * self.factor
+        tenant.interval = self.clamp(interval)
+        tenant.next_poll_at = now + tenant.interval
+        return tenant.interval
+
+    def calls_per_day(self, tenants):
+        """Ожидаемое число запросов к API в сутки при текущих интервалах."""
+        return round(sum(
+            SECONDS_PER_DAY / (tenant.interval or self.base)
+            for tenant in tenants
+        ))
@@ -0,0 +1,144 @@
+"""Token bucket для запросов к API Практикума.
+
+Каждый запрос должен взять по жетону из общего ведра и из ведра
+своего токена. Ведра хранятся либо в памяти процесса, либо в общем
+файле под flock, чтобы бюджет делили несколько процессов.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+
+from exceptions import DeadlineExceededError
+
+GLOBAL_BUCKET = 'global'
+
+
+def refill(tokens, updated_at, rate, capacity, now):
+    """Количество жетонов в ведре к моменту now."""
+    return min(capacity, tokens + max(0, now - updated_at) * rate)
+
+
+def take(buckets, state, now):
+    """Берем по жетону из каждого ведра или возвращаем время ожидания.
+
+    buckets - список (ключ, скорость в секунду, емкость), state -
+    словарь ключ -> [жетоны, время обновления]. Жетоны берутся
+    только если их хватает во всех ведрах сразу.
+    """
+    levels = []
+    wait = 0
+    for key, rate, capacity in buckets:
+        tokens, updated_at = state.get(key, (capacity, now))
+        tokens = refill(tokens, updated_at, rate, capacity, now)
+        levels.append((key, tokens))
+        if tokens < 1:
+            wait = max(wait, (1 - tokens) / rate)
+    for key, tokens in levels:
+        state[key] = [tokens - 1 if not wait else tokens, now]
+    return wait
+
+
+class MemoryBucketStore:
+    """Ведра в памяти процесса."""
+
+    blocking = False
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def take(self, buckets):
+        """Берем жетоны, возвращаем 0 или сколько ждать."""
+        with self._lock:
+            return take(buckets, self._state, self.clock())
+
+
+class FileBucketStore:
+    """Ведра в json-файле, общем для процессов на одной машине.
+
+    take ждет блокировки файла, поэтому в асинхронном коде
+    он выполняется в отдельном потоке.
+    """
+
+    blocking = True
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self.clock = clock
+
+    def take(self, buckets):
+        """Берем жетоны под эксклюзивной блокировкой файла."""
+        import fcntl
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        with os.fdopen(fd, 'r+', encoding='utf-8') as file:
+            fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                content = file.read()
+                state = json.loads(content) if content else {}
+                wait = take(buckets, state, self.clock())
+                file.seek(0)
+                file.truncate()
+                json.dump(state, file)
+                file.flush()
+            finally:
+                fcntl.flock(file, fcntl.LOCK_UN)
+        return wait
+
+
+class RateLimiter:
+    """Общий и по-токенный бюджеты запросов к API.
+
+    sleep - чем ждать жетонов в синхронном acquire.
+    """
+
+    def __init__(self, store, global_rate, global_burst, token_rate,
+                 token_burst, sleep=time.sleep):
+        self.store = store
+        self.sleep = sleep
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.token_rate = token_rate
+        self.token_burst = token_burst
+
+    def buckets(self, token):
+        """Ведра, из которых берет жетон запрос с этим токеном."""
+        digest = hashlib.sha256(str(token).encode()).hexdigest()[:16]
+        return [
+            (GLOBAL_BUCKET, self.global_rate, self.global_burst),
+            (f'token:{digest}', self.token_rate, self.token_burst),
+        ]
+
+    def _check_wait(self, wait, deadline):
+        if deadline is not None and wait >= deadline.remaining():
+            raise DeadlineExceededError(
+                f'Лимит запросов к API: ждать {wait:.1f} с, '
+                'а бюджет цикла меньше'
+            )
+
+    def acquire(self, token, deadline=None):
+        """Ждем, пока запрос с токеном уложится в бюджеты."""
+        buckets = self.buckets(token)
+        while True:
+            wait = self.store.take(buckets)
+            if not wait:
+                return
+            self._check_wait(wait, deadline)
+            self.sleep(wait)
+
+    async def acquire_async(self, token, deadline=None):
+        """Асинхронный вариант acquire."""
+        buckets = self.buckets(token)
+        while True:
+            if self.store.blocking:
+                wait = await asyncio.to_thread(self.store.take, buckets)
+            else:
+                wait = self.store.take(buckets)
+            if not wait:
+                return
+            self._check_wait(wait, deadline)
+            await asyncio.sleep(wait)
@@ -0,0 +1,83 @@
+"""Компактное представление домашек из ответа API."""
+import sys
+from enum import Enum
+
+
+class HomeworkStatus(str, Enum):
+    """Статусы проверки домашки."""
+
+    APPROVED = 'approved'
+    REVIEWING = 'reviewing'
+    REJECTED = 'rejected'
+
+    def __str__(self):
+        return self.value
+
+
+STATUSES = {status.value: status for status in HomeworkStatus}
+
+_set = object.__setattr__
+
+
+class Homework:
+    """Неизменяемая запись о домашке.
+
+    Статус - член HomeworkStatus (неизвестный статус хранится
+    строкой), название интернируется, так что одинаковые значения
+    у тысяч записей не дублируются в памяти.
+    """
+
+    __slots__ = ('id', 'name', 'status', 'date_updated',
+                 'reviewer_comment')
+
+    def __init__(self, id, name, status, date_updated=None,
+                 reviewer_comment=None):
+        _set(self, 'id', id)
+        _set(self, 'name', name)
+        _set(self, 'status', status)
+        _set(self, 'date_updated', date_updated)
+        _set(self, 'reviewer_comment', reviewer_comment)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Запись из декодированного json без проверки статуса."""
+        if 'homework_name' not in data:
+            raise KeyError(f'Ключ "homework_name" отсутствует в {data}')
+        status = data.get('status')
+        if isinstance(status, str):
+            status = STATUSES.get(status) or sys.intern(status)
+        name = data['homework_name']
+        homework = cls.__new__(cls)
+        _set(homework, 'id', data.get('id'))
+        _set(homework, 'name',
+             sys.intern(name) if isinstance(name, str) else name)
+        _set(homework, 'status', status)
+        _set(homework, 'date_updated', data.get('date_updated'))
+        _set(homework, 'reviewer_comment', data.get('reviewer_comment'))
+        return homework
+
+    @property
+    def key(self):
+        """Ключ домашки в состоянии: id, а если его нет - название."""
+        return str(self.name if self.id is None else self.id)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Homework нельзя изменять')
+
+    def __delattr__(self, name):
+        raise AttributeError('Homework нельзя изменять')
+
+    def _fields(self):
+        return (self.id, self.name, self.status, self.date_updated,
+                self.reviewer_comment)
+
+    def __eq__(self, other):
+        if not isinstance(other, Homework):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __hash__(self):
+        return hash(self._fields())
+
+    def __repr__(self):
+        return f'Homework({self.key!r}, {self.name!r}, {self.status!r})'
@@ -0,0 +1,184 @@
+"""Повторы с экспоненциальной задержкой и автомат-предохранитель."""
+import asyncio
+import logging
+import random
+import threading
+import time
+
+from http import HTTPStatus
+
+from exceptions import (CircuitOpenError, DeadlineExceededError,
+                        HTTPStatusError, RequestRejectedError, ResponseError)
+
+TRANSIENT_ERRORS = (ResponseError, HTTPStatusError)
+
+logger = logging.getLogger(__name__)
+
+
+def status_error(status):
+    """Исключение для неуспешного статуса ответа API.
+
+    4xx, кроме 429, означают проблему запроса (например, отозванный
+    токен): такие ошибки не повторяются и не размыкают общий
+    предохранитель. Остальные статусы считаются временными.
+    """
+    message = f'Пришел статус {status}.'
+    if 400 <= status < 500 and status != HTTPStatus.TOO_MANY_REQUESTS:
+        return RequestRejectedError(message)
+    return HTTPStatusError(message)
+
+
+class CircuitBreaker:
+    """Автомат-предохранитель с состояниями closed/open/half-open.
+
+    После failure_threshold сбоев подряд автомат размыкается и
+    recovery_timeout секунд отклоняет запросы. Затем пропускает
+    один пробный запрос: успех замыкает цепь, сбой снова размыкает.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, recovery_timeout=60,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Можно ли сейчас отправить запрос."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if self.clock() - self.opened_at < self.recovery_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                logger.info('Предохранитель API: пробный запрос')
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    return False
+                self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        """Успешный запрос замыкает цепь."""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info('Предохранитель API замкнут')
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def release(self):
+        """Запрос завершился без вердикта о здоровье API.
+
+        Освобождаем место пробного запроса, чтобы следующий
+        запрос в half-open снова мог его занять.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """Учитываем сбой и при необходимости размыкаем цепь."""
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if (self.state == self.HALF_OPEN
+                    or self.failures >= self.failure_threshold):
+                if self.state != self.OPEN:
+                    logger.warning('Предохранитель API разомкнут')
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+    def seconds_until_retry(self):
+        """Сколько еще цепь будет разомкнута."""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0
+            return max(
+                0, self.recovery_timeout - (self.clock() - self.opened_at)
+            )
+
+
+class RetryPolicy:
+    """Повторяет вызов при временных сбоях API.
+
+    Задержка перед повтором выбирается по схеме full jitter:
+    случайно из [0, min(max_delay, base_delay * 2 ** attempt)].
+    Повторяются только исключения из retry_on; если передан
+    deadline, повтор не начинается, когда задержка не влезает в срок.
+    """
+
+    def __init__(self, attempts=3, base_delay=1, max_delay=30,
+                 retry_on=TRANSIENT_ERRORS, breaker=None,
+                 sleep=time.sleep):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = retry_on
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+
+    def backoff(self, attempt):
+        """Задержка перед повтором номер attempt (с нуля)."""
+        return random.uniform(
+            0, min(self.max_delay, self.base_delay * 2 ** attempt)
+        )
+
+    def _before_attempt(self, deadline):
+        if deadline is not None:
+            deadline.check('retry')
+        if not self.breaker.allow():
+            raise CircuitOpenError(
+                'API недоступен, повтор через '
+                f'{self.breaker.seconds_until_retry():.0f} с'
+            )
+
+    def _after_failure(self, attempt, error, deadline):
+        self.breaker.record_failure()
+        if attempt + 1 >= self.attempts:
+            raise error
+        delay = self.backoff(attempt)
+        if deadline is not None and delay >= deadline.remaining():
+            raise DeadlineExceededError(
+                f'Нет времени на повтор после ошибки: {error}'
+            )
+        logger.warning(f'Сбой API: {error}, повтор через {delay:.1f} с')
+        return delay
+
+    def call(self, func, *args, deadline=None, **kwargs):
+        """Вызываем func с повторами при временных сбоях."""
+        for attempt in range(self.attempts):
+            self._before_attempt(deadline)
+            try:
+                result = func(*args, **kwargs)
+            except self.retry_on as error:
+                self.sleep(self._after_failure(attempt, error, deadline))
+            except BaseException:
+                self.breaker.release()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def call_async(self, func, *args, deadline=None, **kwargs):
+        """Асинхронный вариант call для корутин."""
+        for attempt in range(self.attempts):
+            self._before_attempt(deadline)
+            try:
+                result = await func(*args, **kwargs)
+            except self.retry_on as error:
+                await asyncio.sleep(
+                    self._after_failure(attempt, error, deadline)
+                )
+            except BaseException:
+                self.breaker.release()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
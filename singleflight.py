@@ -0,0 +1,74 @@
+"""Объединение одновременных одинаковых запросов к API."""
+import asyncio
+import threading
+
+
+class _Call:
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Выполняет одинаковые по ключу вызовы один раз.
+
+    Пока вызов с ключом key в работе, остальные потоки с тем же
+    ключом ждут его и получают тот же результат или исключение.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """Вызываем func или ждем уже идущий вызов с тем же ключом."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """Вариант SingleFlight для корутин одного event loop."""
+
+    def __init__(self):
+        self._calls = {}
+        self.shared = 0
+
+    async def do(self, key, func, *args, **kwargs):
+        """Ждем корутину func или уже идущий вызов с тем же ключом."""
+        future = self._calls.get(key)
+        if future is not None:
+            self.shared += 1
+            return await asyncio.shield(future)
+        future = asyncio.ensure_future(func(*args, **kwargs))
+        self._calls[key] = future
+        future.add_done_callback(lambda _: self._forget(key, future))
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
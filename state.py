@@ -0,0 +1,157 @@
+"""Локальное состояние домашек тенантов."""
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+
+class HomeworkState:
+    """Последние известные статусы домашек одного тенанта."""
+
+    def __init__(self, statuses=None, current_date=None):
+        self.statuses = statuses or {}
+        self.current_date = current_date
+
+    def update(self, homework):
+        """Запоминаем статус домашки (запись Homework)."""
+        self.statuses[homework.key] = homework.status
+
+    def diff(self, homeworks):
+        """Домашки, статус которых изменился с прошлого раза.
+
+        API отдает свежие домашки первыми, а изменения возвращаются
+        в хронологическом порядке. Состояние не меняется: после
+        обработки каждую домашку нужно передать в update().
+        """
+        return [
+            homework for homework in reversed(homeworks)
+            if self.statuses.get(homework.key) != homework.status
+        ]
+
+
+class StateStore:
+    """Хранит состояние каждого тенанта в отдельном json-файле."""
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, tenant_name):
+        """Путь к файлу состояния тенанта."""
+        name = re.sub(r'[^\w.-]', '_', str(tenant_name))
+        return os.path.join(self.directory, f'{name}.json')
+
+    def load(self, tenant_name):
+        """Читаем состояние тенанта, пустое, если файла еще нет."""
+        try:
+            with open(self.path(tenant_name), encoding='utf-8') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return HomeworkState()
+        return HomeworkState(data.get('statuses'), data.get('current_date'))
+
+    def save(self, tenant_name, state):
+        """Атомарно записываем состояние тенанта."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(tenant_name)
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            json.dump({
+                'current_date': state.current_date,
+                'statuses': state.statuses,
+            }, file, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+
+class StateCache:
+    """LRU-кэш состояний тенантов поверх StateStore.
+
+    В памяти держатся только недавно опрошенные тенанты:
+    когда суммарное число статусов превышает max_entries,
+    самые давние состояния сохраняются на диск и выгружаются.
+    При промахе состояние прозрачно читается из StateStore.
+    """
+
+    def __init__(self, store, max_entries=100_000):
+        self.store = store
+        self.max_entries = max_entries
+        self._states = OrderedDict()
+        self._sizes = {}
+        self._dirty = set()
+        self._entries = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, tenant_name):
+        """Состояние тенанта из памяти или с диска."""
+        with self._lock:
+            state = self._states.get(tenant_name)
+            if state is not None:
+                self._states.move_to_end(tenant_name)
+                self.hits += 1
+                return state
+            self.misses += 1
+        state = self.store.load(tenant_name)
+        with self._lock:
+            cached = self._states.get(tenant_name)
+            if cached is not None:
+                return cached
+            self._add(tenant_name, state)
+            evicted = self._evict()
+        self._save(evicted)
+        return state
+
+    def put(self, tenant_name, state):
+        """Возвращаем измененное состояние в кэш."""
+        with self._lock:
+            self._states.pop(tenant_name, None)
+            self._entries -= self._sizes.pop(tenant_name, 0)
+            self._add(tenant_name, state)
+            self._dirty.add(tenant_name)
+            evicted = self._evict()
+        self._save(evicted)
+
+    def _add(self, tenant_name, state):
+        self._states[tenant_name] = state
+        self._sizes[tenant_name] = len(state.statuses)
+        self._entries += self._sizes[tenant_name]
+
+    def _evict(self):
+        evicted = []
+        while self._entries > self.max_entries and len(self._states) > 1:
+            tenant_name, state = self._states.popitem(last=False)
+            self._entries -= self._sizes.pop(tenant_name)
+            self.evictions += 1
+            if tenant_name in self._dirty:
+                self._dirty.discard(tenant_name)
+                evicted.append((tenant_name, state))
+        return evicted
+
+    def _save(self, states):
+        for tenant_name, state in states:
+            self.store.save(tenant_name, state)
+
+    def flush(self):
+        """Сохраняем на диск все измененные состояния."""
+        with self._lock:
+            dirty = [
+                (tenant_name, self._states[tenant_name])
+                for tenant_name in self._dirty
+            ]
+            self._dirty.clear()
+        self._save(dirty)
+
+    def stats(self):
+        """Попадания, промахи и заполненность кэша."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0,
+                'evictions': self.evictions,
+                'resident': len(self._states),
+                'entries': self._entries,
+            }
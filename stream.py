@@ -0,0 +1,136 @@
+"""Потоковый разбор ответа API с длинной историей домашек.
+
+Ответ читается кусками, и домашки из списка homeworks отдаются
+по одной сразу после разбора, так что в памяти одновременно
+находится только текущая домашка и непрочитанный хвост буфера.
+"""
+import codecs
+import json
+
+from exceptions import EmptyResponseError
+
+WHITESPACE = ' \t\n\r'
+
+_decoder = json.JSONDecoder()
+
+
+class HomeworkStream:
+    """Итератор по домашкам из потока байтов ответа API.
+
+    Проверка идет по ходу чтения: ответ должен быть объектом,
+    homeworks - списком, каждая домашка - словарем. current_date
+    становится известен после того, как поток прочитан до конца.
+    """
+
+    def __init__(self, chunks, close=None):
+        self._chunks = iter(chunks)
+        self._close = close
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self.current_date = None
+        self.count = 0
+
+    def close(self):
+        """Освобождаем соединение, даже если поток не дочитан."""
+        if self._close is not None:
+            self._close()
+            self._close = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _fill(self):
+        if self._eof:
+            raise json.JSONDecodeError(
+                'Ответ API оборвался', self._buffer, len(self._buffer)
+            )
+        if self._pos:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+        for chunk in self._chunks:
+            if chunk:
+                self._buffer += self._text.decode(chunk)
+                return
+        self._buffer += self._text.decode(b'', final=True)
+        self._eof = True
+
+    def _peek(self):
+        while True:
+            while (self._pos < len(self._buffer)
+                   and self._buffer[self._pos] in WHITESPACE):
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if self._eof:
+                return ''
+            self._fill()
+
+    def _expect(self, chars):
+        char = self._peek()
+        if char not in chars or not char:
+            raise json.JSONDecodeError(
+                f'Ожидался один из символов {chars!r}',
+                self._buffer, self._pos
+            )
+        self._pos += 1
+        return char
+
+    def _value(self):
+        while True:
+            self._peek()
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            else:
+                if end < len(self._buffer) or self._eof:
+                    self._pos = end
+                    return value
+            self._fill()
+
+    def _homeworks(self):
+        if self._peek() != '[':
+            raise KeyError('Домашки не являются типом данных list')
+        self._pos += 1
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            homework = self._value()
+            if not isinstance(homework, dict):
+                raise TypeError(
+                    f'Домашка пришла не с типом данных dict: {homework}'
+                )
+            self.count += 1
+            yield homework
+            if self._expect(',]') == ']':
+                return
+
+    def __iter__(self):
+        if self._peek() != '{':
+            raise TypeError('Ответ пришел не с типом данных dict')
+        self._pos += 1
+        seen_homeworks = False
+        if self._peek() == '}':
+            self._pos += 1
+        else:
+            while True:
+                key = self._value()
+                self._expect(':')
+                if key == 'homeworks':
+                    seen_homeworks = True
+                    yield from self._homeworks()
+                elif key == 'current_date':
+                    self.current_date = self._value()
+                else:
+                    self._value()
+                if self._expect(',}') == '}':
+                    break
+        if not seen_homeworks or self.current_date is None:
+            raise EmptyResponseError('Пришел неполный ответ API')
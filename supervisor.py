@@ -0,0 +1,324 @@
+"""Супервизор процессов-воркеров, между которыми делятся тенанты.
+
+Запуск: python homework.py --workers N [--engine async]
+
+Тенанты распределяются по воркерам консистентным хешированием
+имени, поэтому при изменении N переезжает примерно 1/N тенантов.
+Упавший воркер перезапускается с растущей задержкой.
+
+Модули и конфигурация загружаются один раз в супервизоре, а перед
+fork объекты замораживаются gc.freeze(): сборщик мусора в воркерах
+их не трогает, и страницы памяти остаются общими (copy-on-write).
+"""
+import bisect
+import gc
+import hashlib
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from functools import partial
+from multiprocessing.connection import wait
+
+from telegram import Bot
+
+import homework
+from commands import CHECK_REPLY, CommandListener
+from exceptions import TelegrammError
+from metrics import METRICS
+from ratelimit import FileBucketStore, MemoryBucketStore
+
+REPLICAS = 100
+MEMORY_REPORT_INTERVAL = int(os.getenv('MEMORY_REPORT_INTERVAL', 60))
+SHARED_RATE_LIMIT_FILE = 'ratelimit.json'
+MEMORY_FIELDS = {
+    'Rss': 'rss', 'Pss': 'pss', 'Shared_Clean': 'shared',
+    'Shared_Dirty': 'shared',
+}
+
+logger = logging.getLogger(__name__)
+
+
+def ring_hash(key):
+    """Стабильный между процессами и запусками хеш строки."""
+    return int.from_bytes(
+        hashlib.md5(str(key).encode()).digest()[:8], 'big'
+    )
+
+
+class HashRing:
+    """Кольцо консистентного хеширования с виртуальными узлами."""
+
+    def __init__(self, nodes, replicas=REPLICAS):
+        points = sorted(
+            (ring_hash(f'{node}:{replica}'), node)
+            for node in nodes for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for(self, key):
+        """Узел, которому принадлежит ключ."""
+        if not self._nodes:
+            raise LookupError('В кольце нет узлов')
+        index = bisect.bisect(self._hashes, ring_hash(key))
+        return self._nodes[index % len(self._nodes)]
+
+
+def shard(tenants, index, workers):
+    """Тенанты, которые достаются воркеру index."""
+    ring = HashRing(range(workers))
+    return [
+        tenant for tenant in tenants if ring.node_for(tenant.name) == index
+    ]
+
+
+def share_rate_limits(limiter, path=SHARED_RATE_LIMIT_FILE):
+    """Переводим ограничитель API на общий для воркеров файл.
+
+    Ведра в памяти у каждого процесса свои, и N воркеров получили
+    бы N глобальных бюджетов Практикума. Если RATE_LIMIT_FILE
+    не задан, бюджет делится через файл path.
+    """
+    if isinstance(limiter.store, MemoryBucketStore):
+        limiter.store = FileBucketStore(path)
+        logger.info(f'Лимиты API общие для воркеров: {path}')
+
+
+def run_worker(index, workers, engine='sync'):
+    """Тело процесса-воркера: опрос своей доли тенантов.
+
+    Общий лимит Telegram делится между воркерами поровну,
+    команды из Telegram принимает только супервизор.
+    """
+    homework.TELEGRAM_GLOBAL_RATE = homework.TELEGRAM_GLOBAL_RATE / workers
+    homework.OUTBOX_SPILL_FILE = f'{homework.OUTBOX_SPILL_FILE}.{index}'
+    homework.LISTEN_COMMANDS = 0
+    tenants = shard(homework.load_registry(), index, workers)
+    logger.info(f'Воркер {index}: тенантов {len(tenants)}')
+    if engine == 'async':
+        import async_engine
+        async_engine.main(tenants)
+    else:
+        homework.main(tenants)
+
+
+def memory_usage(pid):
+    """Память процесса в кБ: rss, pss и общая с другими процессами.
+
+    Данные берутся из /proc/<pid>/smaps_rollup (Linux);
+    если его нет, возвращается None.
+    """
+    usage = {'rss': 0, 'pss': 0, 'shared': 0}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup', encoding='ascii') as file:
+            for line in file:
+                name, _, value = line.partition(':')
+                if name in MEMORY_FIELDS:
+                    usage[MEMORY_FIELDS[name]] += int(value.split()[0])
+    except OSError:
+        return None
+    return usage
+
+
+class Supervisor:
+    """Держит запущенными workers процессов и перезапускает упавшие.
+
+    target(index) выполняется в отдельном процессе; до того, как
+    воркер поставит свой обработчик, SIGUSR1 в нем игнорируется,
+    чтобы ранняя команда "опросить сейчас" его не убила. Если воркер
+    упал, не проработав stable_after секунд, задержка перед
+    следующим перезапуском удваивается до max_restart_delay.
+    Раз в report_interval секунд логируется память воркеров.
+    """
+
+    def __init__(self, target, workers, restart_delay=1,
+                 max_restart_delay=60, stable_after=60,
+                 report_interval=60, clock=time.monotonic):
+        self.target = target
+        self.workers = workers
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.stable_after = stable_after
+        self.report_interval = report_interval
+        self.clock = clock
+        self._reported_at = clock()
+        self._context = multiprocessing.get_context('fork')
+        self._processes = {}
+        self._started_at = {}
+        self._failures = [0] * workers
+        self._restart_at = {}
+        self.restarts = 0
+
+    def _bootstrap(self, index):
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+        gc.enable()
+        self.target(index)
+
+    def _spawn(self, index):
+        process = self._context.Process(
+            target=self._bootstrap, args=(index,), name=f'worker-{index}'
+        )
+        gc.freeze()
+        process.start()
+        self._processes[index] = process
+        self._started_at[index] = self.clock()
+        logger.info(f'Запущен воркер {index}, pid {process.pid}')
+
+    def start(self):
+        """Запускаем всех воркеров."""
+        for index in range(self.workers):
+            self._spawn(index)
+        return self
+
+    def pids(self):
+        """pid живых воркеров по номерам."""
+        return {
+            index: process.pid
+            for index, process in self._processes.items()
+            if process.is_alive()
+        }
+
+    def memory(self):
+        """Память живых воркеров по номерам, см. memory_usage."""
+        return {
+            index: memory_usage(pid) for index, pid in self.pids().items()
+        }
+
+    def report(self):
+        """Логируем память воркеров и кладем ее в метрики."""
+        memory = self.memory()
+        METRICS.set('workers_memory', memory)
+        logger.info(f'Память воркеров, кБ: {memory}')
+        self._reported_at = self.clock()
+        return memory
+
+    def signal(self, index, signum):
+        """Отправляем сигнал воркеру index, если он жив."""
+        process = self._processes.get(index)
+        if process is not None and process.is_alive():
+            os.kill(process.pid, signum)
+
+    def broadcast(self, signum):
+        """Отправляем сигнал всем живым воркерам."""
+        for index in list(self._processes):
+            self.signal(index, signum)
+
+    def check(self):
+        """Замечаем упавших воркеров и перезапускаем тех, чей срок подошел.
+
+        Возвращает, сколько секунд ждать до ближайшего перезапуска.
+        """
+        now = self.clock()
+        for index, process in list(self._processes.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            del self._processes[index]
+            if now - self._started_at[index] >= self.stable_after:
+                self._failures[index] = 0
+            delay = min(
+                self.max_restart_delay,
+                self.restart_delay * 2 ** self._failures[index]
+            )
+            self._failures[index] += 1
+            self._restart_at[index] = now + delay
+            logger.error(f'Воркер {index} завершился с кодом '
+                         f'{process.exitcode}, перезапуск через {delay} с')
+        for index, restart_at in list(self._restart_at.items()):
+            if restart_at <= now:
+                del self._restart_at[index]
+                self.restarts += 1
+                self._spawn(index)
+        if not self._restart_at:
+            return None
+        return max(0, min(self._restart_at.values()) - now)
+
+    def run(self, stopping, poll_interval=1):
+        """Следим за воркерами, пока не выставлено событие stopping."""
+        while not stopping.is_set():
+            delay = self.check()
+            if self.clock() - self._reported_at >= self.report_interval:
+                self.report()
+            timeout = poll_interval if delay is None else min(
+                delay, poll_interval
+            )
+            wait(
+                [process.sentinel for process in self._processes.values()],
+                timeout
+            )
+
+    def stop(self, timeout=None):
+        """Просим воркеров завершиться, не успевших - убиваем."""
+        processes = [
+            process for process in self._processes.values()
+            if process.is_alive()
+        ]
+        for process in processes:
+            os.kill(process.pid, signal.SIGTERM)
+        finish = None if timeout is None else self.clock() + timeout
+        for process in processes:
+            process.join(
+                None if finish is None else max(0, finish - self.clock())
+            )
+        for process in processes:
+            if process.is_alive():
+                logger.warning(f'Воркер {process.name} не завершился, '
+                               f'убиваем')
+                process.kill()
+                process.join()
+        self._restart_at.clear()
+
+
+def forward_check(supervisor, tenants, workers, bot, chat_id):
+    """Команда /check: отвечаем и будим воркеров с тенантами чата."""
+    ring = HashRing(range(workers))
+    try:
+        homework.send_to_chat(bot, chat_id, CHECK_REPLY)
+    except TelegrammError as error:
+        logger.error(error)
+    for index in {
+        ring.node_for(tenant.name) for tenant in tenants
+        if str(tenant.chat_id) == chat_id
+    }:
+        supervisor.signal(index, signal.SIGUSR1)
+
+
+def main(workers, engine='sync'):
+    """Точка входа супервизора.
+
+    Сборщик мусора отключен до запуска воркеров, чтобы не
+    оставлять дыр в страницах, которые потом будут общими.
+    """
+    gc.disable()
+    if engine == 'async':
+        import async_engine  # noqa: F401 - загружаем до fork
+    share_rate_limits(homework.API_LIMITER)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, homework.request_shutdown)
+    supervisor = Supervisor(
+        partial(run_worker, workers=workers, engine=engine), workers,
+        report_interval=MEMORY_REPORT_INTERVAL
+    )
+    signal.signal(
+        signal.SIGUSR1,
+        lambda signum, frame: supervisor.broadcast(signal.SIGUSR1)
+    )
+    supervisor.start()
+    gc.enable()
+    listener = None
+    if homework.LISTEN_COMMANDS:
+        bot = Bot(token=homework.TELEGRAM_TOKEN)
+        tenants = homework.load_registry()
+        listener = CommandListener(
+            bot, partial(forward_check, supervisor, tenants, workers, bot),
+            [tenant.chat_id for tenant in tenants]
+        ).start()
+    try:
+        supervisor.run(homework.SHUTDOWN)
+    finally:
+        if listener is not None:
+            listener.stop()
+        supervisor.stop(homework.SHUTDOWN_TIMEOUT + 5)
+        logger.info('Супервизор остановлен')
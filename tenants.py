@@ -0,0 +1,206 @@
+"""Реестр аккаунтов (тенантов) и их одновременный опрос."""
+import hashlib
+import heapq
+import json
+import logging
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+logger = logging.getLogger(__name__)
+
+
+class Tenant:
+    """Аккаунт студента: токен Практикума, чат и курсор опроса."""
+
+    __slots__ = ('name', 'practicum_token', 'chat_id', 'headers',
+                 'current_timestamp', 'interval', 'next_poll_at',
+                 'last_status', 'last_change_at')
+
+    def __init__(self, name, practicum_token, chat_id,
+                 current_timestamp=None):
+        self.name = name
+        self.practicum_token = practicum_token
+        self.chat_id = chat_id
+        self.headers = {'Authorization': f'OAuth {practicum_token}'}
+        self.current_timestamp = current_timestamp
+        self.interval = None
+        self.next_poll_at = 0
+        self.last_status = None
+        self.last_change_at = None
+
+    def __repr__(self):
+        return f'Tenant({self.name!r})'
+
+
+def default_name(practicum_token):
+    """Стабильное имя тенанта по хешу его токена.
+
+    По имени хранятся курсор, состояние домашек и номер
+    воркера, поэтому оно не должно зависеть от позиции в файле.
+    """
+    digest = hashlib.sha256(str(practicum_token).encode()).hexdigest()
+    return f'token-{digest[:16]}'
+
+
+def load_tenants(path, current_timestamp=None):
+    """Загружаем тенантов из json-файла.
+
+    Файл содержит список объектов с ключами practicum_token,
+    telegram_chat_id и необязательным name; без name имя
+    выводится из токена (см. default_name). Имена должны
+    быть уникальными.
+    """
+    with open(path, encoding='utf-8') as file:
+        records = json.load(file)
+    if not isinstance(records, list):
+        raise TypeError(f'Файл тенантов {path} должен содержать list')
+    tenants = []
+    for index, record in enumerate(records):
+        try:
+            tenants.append(Tenant(
+                name=record.get('name')
+                or default_name(record['practicum_token']),
+                practicum_token=record['practicum_token'],
+                chat_id=record['telegram_chat_id'],
+                current_timestamp=current_timestamp
+            ))
+        except KeyError as error:
+            raise KeyError(f'В описании тенанта {index} нет ключа {error}')
+    names = [tenant.name for tenant in tenants]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f'Повторяются имена тенантов: {duplicates}')
+    logger.info(f'Загружено тенантов: {len(tenants)}')
+    return tenants
+
+
+class TenantScheduler:
+    """Опрашивает тенантов по расписанию пулом потоков ограниченного размера.
+
+    Сроки следующих опросов хранятся в куче, так что выбор
+    тенантов, которым пора, стоит O(log n) на тенанта. К каждому
+    сроку добавляется случайная задержка до jitter секунд, чтобы
+    опросы тенантов не собирались в одновременные всплески.
+
+    Опросы не ждут друг друга: тенант возвращается в расписание,
+    как только закончился его собственный опрос. Если его срок
+    оказался ближайшим, вызывается on_rescheduled, чтобы цикл
+    пересчитал время ожидания.
+    """
+
+    def __init__(self, tenants, poll, max_workers, jitter=0,
+                 random=random.random, on_rescheduled=None):
+        self.tenants = tenants
+        self.poll = poll
+        self.jitter = jitter
+        self.random = random
+        self.on_rescheduled = on_rescheduled
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='tenant'
+        )
+        self._heap = []
+        self._due_at = {}
+        self._running = set()
+        self._deferred = {}
+        self._sequence = count()
+        self._lock = threading.Lock()
+        for tenant in tenants:
+            self.schedule(tenant, tenant.next_poll_at)
+
+    def _push(self, tenant, when):
+        self._due_at[tenant] = when
+        heapq.heappush(self._heap, (when, next(self._sequence), tenant))
+
+    def schedule(self, tenant, when, jitter=True):
+        """Назначаем опрос тенанта; прежний срок отменяется."""
+        if jitter:
+            when += self.jitter * self.random()
+        with self._lock:
+            self._push(tenant, when)
+
+    def _drop_cancelled(self):
+        while self._heap:
+            when, _, tenant = self._heap[0]
+            if self._due_at.get(tenant) == when:
+                return
+            heapq.heappop(self._heap)
+
+    def due(self, now):
+        """Снимаем с расписания тенантов, у которых подошло время опроса."""
+        tenants = []
+        with self._lock:
+            while True:
+                self._drop_cancelled()
+                if not self._heap or self._heap[0][0] > now:
+                    return tenants
+                when, _, tenant = heapq.heappop(self._heap)
+                del self._due_at[tenant]
+                if tenant in self._running:
+                    self._deferred[tenant] = when
+                else:
+                    tenants.append(tenant)
+
+    def seconds_until_next(self, now):
+        """Сколько ждать до ближайшего опроса."""
+        with self._lock:
+            self._drop_cancelled()
+            if not self._heap:
+                return None
+            return max(0, self._heap[0][0] - now)
+
+    def dispatch(self, now=None):
+        """Отдаем в пул тенантов, которым пора, не дожидаясь опросов.
+
+        Без now опрашиваются все тенанты. Тенант, чей прошлый
+        опрос еще идет, повторно не запускается: срок откладывается
+        до конца опроса. Возвращает список futures.
+        """
+        if now is None:
+            with self._lock:
+                tenants = [
+                    tenant for tenant in self.tenants
+                    if tenant not in self._running
+                ]
+        else:
+            tenants = self.due(now)
+        futures = []
+        for tenant in tenants:
+            with self._lock:
+                self._running.add(tenant)
+            future = self.executor.submit(self.poll, tenant)
+            future.add_done_callback(
+                lambda future, tenant=tenant: self._finished(tenant, future)
+            )
+            futures.append(future)
+        return futures
+
+    def _finished(self, tenant, future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f'Опрос {tenant} упал: {future.exception()}')
+        when = tenant.next_poll_at + self.jitter * self.random()
+        with self._lock:
+            self._running.discard(tenant)
+            pending = self._due_at.get(tenant)
+            deferred = self._deferred.pop(tenant, None)
+            when = min(
+                term for term in (when, deferred, pending)
+                if term is not None
+            )
+            if when != pending:
+                self._push(tenant, when)
+            self._drop_cancelled()
+            first = self._heap[0][2] is tenant
+        if first and self.on_rescheduled is not None:
+            self.on_rescheduled()
+
+    def shutdown(self):
+        """Дожидаемся начатых опросов и останавливаем пул."""
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
@@ -0,0 +1,242 @@
+import asyncio
+import json
+import os
+import signal
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+import async_engine
+import homework
+from checkpoint import CheckpointStore
+from deadline import Deadline
+from digest import ErrorDigest
+from ratelimit import MemoryBucketStore, RateLimiter
+from retry import RetryPolicy
+from state import StateCache, StateStore
+from tenants import Tenant
+
+HOMEWORK = {'id': 1, 'homework_name': 'hw1', 'status': 'approved',
+            'date_updated': '2024-01-01T00:00:00Z'}
+
+
+async def serve(routes):
+    app = web.Application()
+    app.add_routes(routes)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+class FakeOutbox:
+
+    def __init__(self):
+        self.messages = []
+
+    def put(self, chat_id, text, key=None):
+        self.messages.append((chat_id, text, key))
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """Изолированные от диска и сети глобальные объекты homework."""
+    monkeypatch.setattr(homework, 'STATES',
+                        StateCache(StateStore(str(tmp_path / 'state'))))
+    monkeypatch.setattr(homework, 'CHECKPOINTS',
+                        CheckpointStore(str(tmp_path / 'checkpoints.json')))
+    monkeypatch.setattr(homework, 'API_LIMITER', RateLimiter(
+        MemoryBucketStore(), 1000, 1000, 1000, 1000
+    ))
+    monkeypatch.setattr(homework, 'API_RETRY', RetryPolicy(attempts=1))
+    monkeypatch.setattr(homework, 'ERROR_DIGEST', ErrorDigest())
+    monkeypatch.setattr(homework, 'SHUTDOWN_DEADLINE', Deadline(float('inf')))
+    monkeypatch.setattr(homework, 'POLL_JITTER', 0)
+    monkeypatch.setattr(homework, 'LISTEN_COMMANDS', 0)
+    return monkeypatch
+
+
+def api_answer(homeworks, current_date=200):
+    async def answer(request):
+        return web.json_response(
+            {'homeworks': homeworks, 'current_date': current_date}
+        )
+    return answer
+
+
+class TestPollOnce:
+
+    def test_changes_are_queued_with_keys(self, engine):
+        outbox = FakeOutbox()
+        tenant = Tenant('student', 'token', 1, current_timestamp=100)
+
+        async def scenario():
+            server = await serve([web.get('/api', api_answer([HOMEWORK]))])
+            engine.setattr(homework, 'ENDPOINT', str(server.make_url('/api')))
+            async with aiohttp.ClientSession() as http:
+                first = await async_engine.poll_once(http, tenant, outbox)
+                await async_engine.poll_once(http, tenant, outbox)
+            await server.close()
+            return first
+
+        homeworks = asyncio.run(scenario())
+        assert [item.name for item in homeworks] == ['hw1']
+        assert outbox.messages == [(
+            1, homework.parse_status(homeworks[0]),
+            homework.notification_key(tenant, homeworks[0])
+        )], 'Сообщение должно уходить через очередь и только один раз'
+        assert tenant.current_timestamp == 200
+
+
+class TestWatch:
+
+    def test_wakeup_polls_again_and_stop_ends_loop(self, engine):
+        requests = []
+        tenant = Tenant('student', 'token', 1, current_timestamp=100)
+
+        async def answer(request):
+            requests.append(request.query['from_date'])
+            return web.json_response({'homeworks': [], 'current_date': 200})
+
+        async def scenario():
+            server = await serve([web.get('/api', answer)])
+            engine.setattr(homework, 'ENDPOINT', str(server.make_url('/api')))
+            stopping, wakeup = asyncio.Event(), asyncio.Event()
+            async with aiohttp.ClientSession() as http:
+                watcher = asyncio.create_task(async_engine.watch(
+                    http, tenant, FakeOutbox(), asyncio.Semaphore(1),
+                    stopping, wakeup
+                ))
+                await asyncio.sleep(0.2)
+                wakeup.set()
+                await asyncio.sleep(0.2)
+                stopping.set()
+                wakeup.set()
+                await asyncio.wait_for(watcher, 1)
+            await server.close()
+
+        asyncio.run(scenario())
+        assert requests == ['100', '200'], (
+            'wakeup должен запускать опрос сразу, а не по интервалу'
+        )
+
+    def test_error_is_reported_to_chat_once(self, engine):
+        outbox = FakeOutbox()
+        tenant = Tenant('student', 'token', 1, current_timestamp=100)
+
+        async def broken(request):
+            return web.Response(status=500)
+
+        async def scenario():
+            server = await serve([web.get('/api', broken)])
+            engine.setattr(homework, 'ENDPOINT', str(server.make_url('/api')))
+            stopping, wakeup = asyncio.Event(), asyncio.Event()
+            async with aiohttp.ClientSession() as http:
+                watcher = asyncio.create_task(async_engine.watch(
+                    http, tenant, outbox, asyncio.Semaphore(1),
+                    stopping, wakeup
+                ))
+                for _ in range(2):
+                    await asyncio.sleep(0.1)
+                    wakeup.set()
+                await asyncio.sleep(0.1)
+                stopping.set()
+                wakeup.set()
+                await asyncio.wait_for(watcher, 1)
+            await server.close()
+
+        asyncio.run(scenario())
+        assert len(outbox.messages) == 1, (
+            'Повторяющаяся ошибка должна уходить в чат один раз за окно'
+        )
+        assert outbox.messages[0][0] == 1
+
+
+class TestRun:
+
+    def test_polls_tenants_and_stops_on_sigterm(self, engine, tmp_path):
+        outbox = FakeOutbox()
+        tenants = [Tenant(name, name, index)
+                   for index, name in enumerate(['a', 'b'])]
+
+        async def scenario():
+            server = await serve([web.get('/api', api_answer([HOMEWORK]))])
+            engine.setattr(homework, 'ENDPOINT', str(server.make_url('/api')))
+            asyncio.get_running_loop().call_later(
+                0.3, os.kill, os.getpid(), signal.SIGTERM
+            )
+            await asyncio.wait_for(async_engine.run(tenants, outbox), 5)
+            await server.close()
+
+        asyncio.run(scenario())
+        assert sorted(chat_id for chat_id, _, _ in outbox.messages) == [0, 1]
+        assert json.loads(
+            (tmp_path / 'checkpoints.json').read_text()
+        ) == {'a': 200, 'b': 200}, 'При остановке курсоры сохраняются'
+
+
+class TestListenCommands:
+
+    def test_error_reply_backs_off(self, monkeypatch):
+        requests = []
+
+        async def conflict(request):
+            requests.append(request)
+            return web.json_response(
+                {'ok': False, 'description': 'Conflict'}, status=409
+            )
+
+        async def scenario():
+            server = await serve([web.post('/getUpdates', conflict)])
+            monkeypatch.setattr(async_engine, 'TELEGRAM_UPDATES',
+                                str(server.make_url('/getUpdates')))
+            monkeypatch.setattr(async_engine, 'COMMANDS_RETRY_DELAY', 0.2)
+            async with aiohttp.ClientSession() as http:
+                listener = asyncio.create_task(
+                    async_engine.listen_commands(http, None, [1])
+                )
+                await asyncio.sleep(0.5)
+                listener.cancel()
+                await asyncio.gather(listener, return_exceptions=True)
+            await server.close()
+
+        asyncio.run(scenario())
+        assert 1 <= len(requests) <= 3, (
+            'После ответа 409 запросы getUpdates должны идти с задержкой'
+        )
+
+    def test_check_command_from_known_chat(self, monkeypatch):
+        checks = []
+        updates = [
+            {'update_id': 1,
+             'message': {'chat': {'id': 1}, 'text': '/check'}},
+            {'update_id': 2,
+             'message': {'chat': {'id': 2}, 'text': '/check'}},
+        ]
+
+        async def get_updates(request):
+            first = (await request.json())['offset'] is None
+            return web.json_response(
+                {'ok': True, 'result': updates if first else []}
+            )
+
+        async def on_check(chat_id):
+            checks.append(chat_id)
+
+        async def scenario():
+            server = await serve([web.post('/getUpdates', get_updates)])
+            monkeypatch.setattr(async_engine, 'TELEGRAM_UPDATES',
+                                str(server.make_url('/getUpdates')))
+            monkeypatch.setattr(async_engine, 'UPDATES_TIMEOUT', 0)
+            async with aiohttp.ClientSession() as http:
+                listener = asyncio.create_task(
+                    async_engine.listen_commands(http, on_check, [1])
+                )
+                await asyncio.sleep(0.2)
+                listener.cancel()
+                await asyncio.gather(listener, return_exceptions=True)
+            await server.close()
+
+        asyncio.run(scenario())
+        assert checks == ['1']
@@ -0,0 +1,54 @@
+import json
+
+import backfill
+import homework
+from checkpoint import CheckpointStore
+from state import StateStore
+from stream import HomeworkStream
+from tenants import Tenant
+
+
+class TestBackfill:
+
+    def test_backfill_streams_history_into_state(self, monkeypatch,
+                                                 tmp_path):
+        response = {
+            'homeworks': [
+                {'id': index, 'homework_name': f'hw{index}',
+                 'status': 'approved'}
+                for index in range(7)
+            ],
+            'current_date': 1000,
+        }
+        body = json.dumps(response).encode()
+        requested = []
+
+        def mock_stream_homeworks(current_timestamp, tenant=None,
+                                  deadline=None):
+            requested.append(current_timestamp)
+            return HomeworkStream([body[:10], body[10:]])
+
+        def fail_send(*args, **kwargs):
+            raise AssertionError('Бэкфилл не должен отправлять сообщения')
+
+        monkeypatch.setattr(homework, 'stream_homeworks',
+                            mock_stream_homeworks)
+        monkeypatch.setattr(homework, 'send_to_chat', fail_send)
+        checkpoints = CheckpointStore(str(tmp_path / 'checkpoints.json'))
+        monkeypatch.setattr(homework, 'CHECKPOINTS', checkpoints)
+        store = StateStore(str(tmp_path))
+        tenant = Tenant('ivan', 'token', 1)
+
+        count = backfill.backfill_tenant(tenant, store, since=0,
+                                         batch_size=3)
+
+        assert count == 7
+        assert requested == [0], (
+            'Бэкфилл должен запрашивать историю с from_date=0'
+        )
+        state = store.load('ivan')
+        assert state.current_date == 1000
+        assert state.statuses == {str(i): 'approved' for i in range(7)}
+        assert checkpoints.get('ivan') == 1000, (
+            'После бэкфилла курсор тенанта должен сохраниться'
+        )
@@ -0,0 +1,79 @@
+import json
+from http import HTTPStatus
+
+import homework
+from cache import ResponseCache
+from tenants import Tenant
+
+
+class TestResponseCache:
+
+    def test_conditional_headers_and_hit(self):
+        cache = ResponseCache()
+        assert cache.conditional_headers('token', 1) == {}, (
+            'Для пустого кэша условные заголовки не отправляются'
+        )
+        response = {'homeworks': [], 'current_date': 1}
+        cache.store(
+            'token', 1,
+            {'ETag': '"abc"', 'Last-Modified': 'Wed, 21 Oct 2015'},
+            response, []
+        )
+        assert cache.conditional_headers('token', 1) == {
+            'If-None-Match': '"abc"',
+            'If-Modified-Since': 'Wed, 21 Oct 2015',
+        }
+        entry = cache.hit('token', 1)
+        assert entry.response is response, (
+            'На 304 кэш должен вернуть сохраненный ответ'
+        )
+        assert cache.stats() == {'hits': 1, 'misses': 1}
+
+    def test_new_cursor_misses(self):
+        cache = ResponseCache()
+        cache.store('token', 1, {'ETag': '"abc"'}, {}, [])
+        assert cache.conditional_headers('token', 2) == {}, (
+            'Запись для старого курсора не должна использоваться'
+        )
+        assert cache.hit('token', 2) is None
+
+    def test_response_without_validators_not_cached(self):
+        cache = ResponseCache()
+        cache.store('token', 1, {}, {}, [])
+        assert cache.hit('token', 1) is None
+
+
+class TestConditionalPolling:
+
+    def test_empty_polls_keep_cursor_and_hit_cache(self, monkeypatch):
+        requests = []
+
+        class Response:
+            def __init__(self, status_code, headers=None, content=b''):
+                self.status_code = status_code
+                self.headers = headers or {}
+                self.content = content
+
+        def mock_request_checked(timestamp, headers, deadline):
+            requests.append((timestamp, headers.get('If-None-Match')))
+            if headers.get('If-None-Match') == '"v1"':
+                return Response(HTTPStatus.NOT_MODIFIED)
+            return Response(
+                HTTPStatus.OK, {'ETag': '"v1"'},
+                json.dumps({'homeworks': [], 'current_date': 200}).encode()
+            )
+
+        monkeypatch.setattr(homework, 'request_checked', mock_request_checked)
+        monkeypatch.setattr(homework, 'RESPONSE_CACHE', ResponseCache())
+        tenant = Tenant('student', 'token', 1, current_timestamp=100)
+        for _ in range(2):
+            response, homeworks = homework.fetch_homeworks(
+                tenant.current_timestamp, tenant
+            )
+            tenant.current_timestamp = homework.next_cursor(
+                tenant, response, homeworks
+            )
+        assert requests == [(100, None), (100, '"v1"')], (
+            'Пока домашек нет, курсор не должен двигаться'
+        )
+        assert homework.RESPONSE_CACHE.stats()['hits'] == 1
@@ -0,0 +1,53 @@
+import json
+
+from checkpoint import CheckpointStore
+from utils import FakeClock
+
+
+class TestCheckpointStore:
+
+    def test_updates_are_batched(self, tmp_path):
+        clock = FakeClock()
+        path = tmp_path / 'checkpoints.json'
+        store = CheckpointStore(str(path), flush_interval=5, clock=clock)
+        store.update('a', 100)
+        store.update('b', 200)
+        assert not store.flush(), (
+            'До истечения интервала курсоры не должны писаться на диск'
+        )
+        assert not path.exists()
+        clock.now = 5
+        assert store.flush()
+        assert json.loads(path.read_text()) == {'a': 100, 'b': 200}
+        assert store.writes == 1
+        assert not store.flush(force=True), (
+            'Без изменений файл не должен перезаписываться'
+        )
+
+    def test_force_flush_and_restore(self, tmp_path):
+        path = str(tmp_path / 'checkpoints.json')
+        store = CheckpointStore(path)
+        store.update('a', 100)
+        assert store.flush(force=True)
+        restored = CheckpointStore(path)
+        assert restored.load() == {'a': 100}
+        assert restored.get('a') == 100
+        assert restored.get('missing', 7) == 7
+
+    def test_missing_file(self, tmp_path):
+        store = CheckpointStore(str(tmp_path / 'nope.json'))
+        assert store.load() == {}
+
+    def test_processes_do_not_overwrite_each_other(self, tmp_path):
+        path = str(tmp_path / 'checkpoints.json')
+        first = CheckpointStore(path)
+        second = CheckpointStore(path)
+        first.load()
+        second.load()
+        first.update('a', 100)
+        second.update('b', 200)
+        first.flush(force=True)
+        second.flush(force=True)
+        assert CheckpointStore(path).load() == {'a': 100, 'b': 200}, (
+            'Курсоры разных процессов должны сливаться в одном файле'
+        )
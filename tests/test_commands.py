@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from commands import CommandListener, is_check_command
+
+
+def make_update(update_id, chat_id, text):
+    return SimpleNamespace(
+        update_id=update_id,
+        effective_message=SimpleNamespace(chat_id=chat_id, text=text)
+    )
+
+
+class TestCommands:
+
+    def test_is_check_command(self):
+        assert is_check_command('/check')
+        assert is_check_command('/check@homework_bot сейчас')
+        assert not is_check_command('/checkout')
+        assert not is_check_command('проверь')
+        assert not is_check_command(None)
+
+    def test_listener_wakes_only_known_chats(self):
+        checked = []
+        listener = CommandListener(None, checked.append, chats=[1, '2'])
+        listener.handle([
+            make_update(10, 1, '/check'),
+            make_update(11, 3, '/check'),
+            make_update(12, 2, 'привет'),
+            SimpleNamespace(update_id=13, effective_message=None),
+        ])
+        assert checked == ['1'], (
+            'Проверку можно запросить только из чата тенанта'
+        )
+        assert listener._offset == 14
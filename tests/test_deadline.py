@@ -0,0 +1,37 @@
+import pytest
+
+from deadline import Deadline
+from exceptions import DeadlineExceededError
+from utils import FakeClock
+
+
+class TestDeadline:
+
+    def test_timeouts_come_from_remaining_budget(self):
+        clock = FakeClock()
+        deadline = Deadline(10, connect_timeout=3, clock=clock)
+        assert deadline.timeout('fetch') == (3, 10)
+        clock.now = 8
+        assert deadline.timeout('send') == (2, 2), (
+            'Таймауты не должны выходить за остаток бюджета цикла'
+        )
+
+    def test_exceeded_deadline_raises(self):
+        clock = FakeClock()
+        deadline = Deadline(5, clock=clock)
+        clock.now = 5
+        with pytest.raises(DeadlineExceededError, match='send'):
+            deadline.timeout('send')
+
+    def test_parent_caps_running_deadline(self):
+        clock = FakeClock()
+        shutdown = Deadline(float('inf'), clock=clock)
+        deadline = Deadline(60, clock=clock, parent=shutdown)
+        assert deadline.remaining() == 60
+        clock.now = 10
+        shutdown.cap(5)
+        assert deadline.remaining() == 5, (
+            'Начатый цикл должен укладываться в срок остановки'
+        )
+        shutdown.cap(20)
+        assert deadline.remaining() == 5, 'Срок можно только сократить'
@@ -0,0 +1,43 @@
+from digest import ErrorDigest, fingerprint
+from exceptions import HTTPStatusError, ResponseError
+from utils import FakeClock
+
+
+class TestErrorDigest:
+
+    def test_fingerprint_ignores_numbers(self):
+        assert fingerprint(HTTPStatusError('Пришел статус 502.')) == (
+            fingerprint(HTTPStatusError('Пришел статус 503.'))
+        )
+        assert fingerprint(HTTPStatusError('x')) != (
+            fingerprint(ResponseError('x'))
+        )
+
+    def test_repeats_are_suppressed_and_summarized(self):
+        clock = FakeClock()
+        digest = ErrorDigest(window=600, clock=clock)
+        first = digest.record(1, ResponseError('API упал'))
+        assert first == 'Сбой в работе программы: API упал', (
+            'Первая ошибка должна отправляться сразу'
+        )
+        for _ in range(5):
+            assert digest.record(1, ResponseError('API упал')) is None
+        assert digest.record(2, ResponseError('API упал')) is not None, (
+            'Дедупликация должна работать отдельно для каждого чата'
+        )
+        assert digest.due() == []
+        clock.now = 600
+        [(chat_id, summary)] = digest.due()
+        assert chat_id == 1
+        assert 'повторов: 5' in summary
+        assert digest.suppressed == 5
+
+    def test_quiet_window_forgets_fingerprint(self):
+        clock = FakeClock()
+        digest = ErrorDigest(window=600, clock=clock)
+        digest.record(1, ResponseError('API упал'))
+        clock.now = 600
+        assert digest.due() == []
+        assert digest.record(1, ResponseError('API упал')) is not None, (
+            'После тихого окна ошибка снова должна уходить сразу'
+        )
@@ -0,0 +1,214 @@
+import threading
+import time
+
+import pytest
+import telegram
+
+import homework
+from durable_outbox import DurableOutbox
+from exceptions import MessageRejectedError
+from outbox import Outbox
+from utils import FakeClock
+
+FAST = {'global_rate': 1000, 'chat_rate': 1000}
+
+
+def make_outbox(path, send, workers=1):
+    return DurableOutbox(str(path), Outbox(send, workers=workers, **FAST))
+
+
+class TestDurableOutbox:
+
+    def test_undelivered_messages_survive_restart(self, tmp_path):
+        path = tmp_path / 'outbox.sqlite3'
+        first = make_outbox(path, lambda *args: None, workers=0)
+        first.put(1, 'Работа проверена', key='hw1:approved')
+        first.flush()
+        assert first.stored() == 1
+
+        delivered = []
+        second = make_outbox(
+            path, lambda chat_id, text: delivered.append((chat_id, text))
+        ).start()
+        second.stop(5)
+        assert delivered == [('1', 'Работа проверена')], (
+            'Недоставленное сообщение должно уйти после перезапуска'
+        )
+        assert make_outbox(path, None, workers=0).stored() == 0
+
+    def test_idempotency_key_prevents_duplicates(self, tmp_path):
+        delivered = []
+        outbox = make_outbox(
+            tmp_path / 'outbox.sqlite3',
+            lambda chat_id, text: delivered.append(text)
+        ).start()
+        outbox.put(1, 'Работа проверена', key='hw1:approved')
+        outbox.put(1, 'Работа проверена', key='hw1:approved')
+        outbox.stop(5)
+        assert delivered == ['Работа проверена']
+
+        replay = make_outbox(
+            tmp_path / 'outbox.sqlite3',
+            lambda chat_id, text: delivered.append(text)
+        ).start()
+        replay.put(1, 'Работа проверена', key='hw1:approved')
+        replay.stop(5)
+        assert delivered == ['Работа проверена'], (
+            'Повтор уже доставленного ключа не должен дублировать сообщение'
+        )
+        assert replay.stats()['duplicates'] == 1
+
+    def test_failed_send_stays_in_database(self, tmp_path):
+        def broken(chat_id, text):
+            raise ValueError('Telegram недоступен')
+
+        outbox = make_outbox(tmp_path / 'outbox.sqlite3', broken).start()
+        outbox.put(1, 'текст')
+        outbox.stop(5)
+        assert make_outbox(
+            tmp_path / 'outbox.sqlite3', None, workers=0
+        ).stored() == 1
+
+    def test_replay_only_own_chats(self, tmp_path):
+        path = tmp_path / 'outbox.sqlite3'
+        first = make_outbox(path, lambda *args: None, workers=0)
+        first.put(1, 'первому', key='a')
+        first.put(2, 'второму', key='b')
+        first.flush()
+
+        delivered = []
+        worker = make_outbox(
+            path, lambda chat_id, text: delivered.append((chat_id, text))
+        ).start(chats=[2])
+        worker.stop(5)
+        assert delivered == [('2', 'второму')], (
+            'Процесс должен досылать только сообщения своих чатов'
+        )
+        assert make_outbox(path, None, workers=0).stored() == 1
+
+    def test_spill_keeps_overflow_in_database(self, tmp_path):
+        path = tmp_path / 'outbox.sqlite3'
+        outbox = DurableOutbox(str(path), Outbox(
+            None, maxsize=2, workers=0, policy=Outbox.SPILL,
+            spill_path=str(tmp_path / 'spill.jsonl'), **FAST
+        ))
+        for index in range(5):
+            outbox.put(1, f'сообщение {index}')
+        outbox.flush()
+        assert outbox.outbox.depth() == 2, (
+            'В памяти не должно быть больше maxsize сообщений'
+        )
+        assert outbox.stored() == 5
+        assert not (tmp_path / 'spill.jsonl').exists()
+
+    def test_refill_after_delivery(self, tmp_path):
+        outbox = DurableOutbox(str(tmp_path / 'outbox.sqlite3'), Outbox(
+            None, maxsize=2, workers=0, policy=Outbox.SPILL,
+            spill_path=str(tmp_path / 'spill.jsonl'), **FAST
+        ))
+        for index in range(3):
+            outbox.put(1, f'сообщение {index}', key=str(index))
+        outbox.flush()
+        assert outbox.refill() == 0
+        outbox.delivered('0')
+        outbox.flush()
+        assert outbox.refill() == 1
+        assert outbox.stored() == 2
+
+    def test_dropped_message_removed_from_database(self, tmp_path):
+        outbox = DurableOutbox(str(tmp_path / 'outbox.sqlite3'), Outbox(
+            None, maxsize=2, workers=0, policy=Outbox.DROP_OLDEST, **FAST
+        ))
+        for index in range(3):
+            outbox.put(1, f'сообщение {index}', key=str(index))
+        outbox.flush()
+        outbox.flush()
+        assert outbox.stored() == 2, (
+            'Выброшенное из очереди сообщение не должно уйти при перезапуске'
+        )
+
+    def test_block_waits_for_room(self, tmp_path):
+        outbox = DurableOutbox(str(tmp_path / 'outbox.sqlite3'), Outbox(
+            None, maxsize=1, workers=0, **FAST
+        ))
+        outbox.put(1, 'первое', key='a')
+        outbox.flush()
+        second = threading.Thread(target=outbox.put, args=(1, 'второе'))
+        second.start()
+        second.join(0.2)
+        assert second.is_alive(), 'put должен ждать свободного места'
+        outbox.delivered('a')
+        second.join(1)
+        assert not second.is_alive()
+
+    def test_failed_send_is_retried_with_backoff(self, tmp_path):
+        clock = FakeClock()
+        outbox = DurableOutbox(
+            str(tmp_path / 'outbox.sqlite3'),
+            Outbox(None, workers=0, **FAST), retry_delay=10, clock=clock
+        )
+        outbox.put(1, 'текст', key='a')
+        outbox.flush()
+        outbox.failed('a')
+        assert outbox.refill() == 0, 'Повтор не должен уйти раньше задержки'
+        clock.now += 10
+        assert outbox.refill() == 1
+        outbox.failed('a')
+        clock.now += 10
+        assert outbox.refill() == 0, 'Задержка должна расти с попытками'
+        clock.now += 10
+        assert outbox.refill() == 1
+
+    def test_stop_is_bounded_by_timeout(self, tmp_path):
+        release = threading.Event()
+        outbox = make_outbox(
+            tmp_path / 'outbox.sqlite3', lambda *args: release.wait(5)
+        ).start()
+        outbox.put(1, 'текст')
+        outbox.put(2, 'текст')
+        outbox.flush()
+        started = time.monotonic()
+        assert not outbox.stop(0.3)
+        assert time.monotonic() - started < 1, (
+            'Досылка и запись журнала делят один timeout'
+        )
+        release.set()
+
+    def test_rejected_message_is_dead_lettered(self, tmp_path):
+        outbox = make_outbox(tmp_path / 'outbox.sqlite3', None, workers=0)
+        outbox.put(1, 'текст', key='a')
+        outbox.flush()
+        outbox.failed('a', MessageRejectedError('Forbidden: bot was blocked'))
+        outbox.flush()
+        assert outbox.stored() == 0, (
+            'Отклоненное Telegram сообщение не должно повторяться'
+        )
+        assert outbox.stats()['rejected'] == 1
+
+    def test_gives_up_after_max_attempts(self, tmp_path):
+        clock = FakeClock()
+        outbox = DurableOutbox(
+            str(tmp_path / 'outbox.sqlite3'),
+            Outbox(None, workers=0, **FAST), max_attempts=3, clock=clock
+        )
+        outbox.put(1, 'текст', key='a')
+        outbox.flush()
+        for _ in range(3):
+            outbox.failed('a', ValueError('Telegram недоступен'))
+            clock.now += 1000
+            outbox.refill()
+        outbox.flush()
+        assert outbox.stored() == 0
+        assert outbox.refill() == 0
+
+    @pytest.mark.parametrize('error', [
+        telegram.error.Unauthorized('Forbidden: bot was blocked by the user'),
+        telegram.error.BadRequest('Chat not found'),
+    ])
+    def test_permanent_telegram_errors_are_rejections(self, error):
+        class Bot:
+            def send_message(self, **kwargs):
+                raise error
+
+        with pytest.raises(MessageRejectedError):
+            homework.send_to_chat(Bot(), 1, 'текст')
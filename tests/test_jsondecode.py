@@ -0,0 +1,22 @@
+import json
+
+import pytest
+
+from jsondecode import BACKENDS, get_decoder
+
+
+class TestJsonDecoder:
+
+    @pytest.mark.parametrize('name', sorted(BACKENDS))
+    def test_backends_agree(self, name):
+        body = '{"homeworks": [{"status": "approved"}], "current_date": 1}'
+        assert get_decoder(name)(body.encode()) == json.loads(body)
+
+    @pytest.mark.parametrize('name', sorted(BACKENDS))
+    def test_invalid_json_raises_json_decode_error(self, name):
+        with pytest.raises(json.JSONDecodeError):
+            get_decoder(name)(b'<html>502 Bad Gateway</html>')
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            get_decoder('simdjson')
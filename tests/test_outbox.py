@@ -0,0 +1,133 @@
+import threading
+import time
+
+import pytest
+
+from exceptions import RetryAfterError
+from outbox import Outbox
+
+FAST = {'global_rate': 1000, 'chat_rate': 1000}
+
+
+class TestOutbox:
+
+    def test_messages_are_delivered_by_workers(self):
+        delivered = []
+        outbox = Outbox(lambda chat_id, text: delivered.append(
+            (chat_id, text)), workers=2, **FAST).start()
+        for index in range(10):
+            outbox.put(index % 3, f'сообщение {index}')
+        outbox.stop(5)
+        assert sorted(delivered) == sorted(
+            (index % 3, f'сообщение {index}') for index in range(10)
+        )
+        assert outbox.stats()['sent'] == 10
+
+    def test_drop_oldest(self):
+        delivered = []
+        outbox = Outbox(lambda chat_id, text: delivered.append(text),
+                        maxsize=2, workers=1, policy=Outbox.DROP_OLDEST,
+                        **FAST)
+        outbox.put(1, '0')
+        outbox.put(2, '1')
+        outbox.put(1, '2')
+        outbox.start().stop(5)
+        assert sorted(delivered) == ['1', '2'], (
+            'При переполнении должно выбрасываться самое старое сообщение'
+        )
+        assert outbox.stats()['dropped'] == 1
+
+    def test_spill_to_file_and_back(self, tmp_path):
+        release = threading.Event()
+        delivered = []
+
+        def send(chat_id, text):
+            release.wait(5)
+            delivered.append(text)
+
+        outbox = Outbox(send, maxsize=2, workers=1, policy=Outbox.SPILL,
+                        spill_path=str(tmp_path / 'spill'), **FAST).start()
+        for index in range(6):
+            outbox.put(index, str(index))
+        assert outbox.depth() >= 3, (
+            'Сообщения сверх лимита должны уходить в файл, а не теряться'
+        )
+        release.set()
+        outbox.stop(5)
+        assert sorted(delivered) == [str(index) for index in range(6)]
+
+    def test_spill_requires_path(self):
+        with pytest.raises(ValueError):
+            Outbox(lambda *args: None, policy=Outbox.SPILL)
+
+    def test_chats_are_served_round_robin(self):
+        delivered = []
+        outbox = Outbox(lambda chat_id, text: delivered.append(chat_id),
+                        workers=1, **FAST)
+        for _ in range(3):
+            outbox.put('a', 'текст')
+        for _ in range(3):
+            outbox.put('b', 'текст')
+        outbox.start().stop(5)
+        assert delivered == ['a', 'b', 'a', 'b', 'a', 'b'], (
+            'Чаты должны обслуживаться по кругу'
+        )
+
+    def test_per_chat_rate_limit(self):
+        outbox = Outbox(lambda chat_id, text: None, workers=2,
+                        global_rate=1000, chat_rate=20)
+        for _ in range(5):
+            outbox.put('a', 'текст')
+        started = time.monotonic()
+        outbox.start().stop(5)
+        assert time.monotonic() - started >= 0.18, (
+            'В один чат нельзя отправлять чаще chat_rate сообщений в секунду'
+        )
+
+    def test_retry_after_pauses_and_requeues(self):
+        delivered = []
+
+        def send(chat_id, text):
+            if not outbox.throttled:
+                raise RetryAfterError('flood', 0.2)
+            delivered.append(text)
+
+        outbox = Outbox(send, workers=1, **FAST)
+        outbox.put('a', 'первое')
+        outbox.put('a', 'второе')
+        started = time.monotonic()
+        outbox.start().stop(5)
+        assert time.monotonic() - started >= 0.2
+        assert delivered == ['первое', 'второе'], (
+            'После RetryAfter сообщение должно уйти первым в своем чате'
+        )
+
+    def test_failed_key_is_reported(self):
+        def send(chat_id, text):
+            raise ValueError('Telegram недоступен')
+
+        failed = []
+        outbox = Outbox(send, workers=1, **FAST,
+                        on_failed=lambda key, error: failed.append(key))
+        outbox.put('a', 'текст', key='k')
+        outbox.start().stop(5)
+        assert failed == ['k']
+        assert outbox.failed == 1
+
+    def test_stop_timeout_is_shared_by_workers(self):
+        release = threading.Event()
+
+        def send(chat_id, text):
+            release.wait(5)
+
+        outbox = Outbox(send, workers=3, **FAST).start()
+        for index in range(6):
+            outbox.put(index, 'сообщение')
+        started = time.monotonic()
+        assert not outbox.stop(0.3), (
+            'stop должен сообщать, что очередь не успела опустеть'
+        )
+        assert time.monotonic() - started < 1, (
+            'Ожидание всех отправителей ограничено одним timeout'
+        )
+        release.set()
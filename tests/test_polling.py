@@ -0,0 +1,60 @@
+from polling import AdaptiveInterval
+from records import Homework
+from tenants import Tenant
+
+
+def make_policy():
+    return AdaptiveInterval(
+        base=600, minimum=60, maximum=3600, reviewing=120, idle_after=3600
+    )
+
+
+class TestAdaptiveInterval:
+
+    def test_reviewing_polls_faster(self):
+        policy = make_policy()
+        tenant = Tenant('t', 'token', 1)
+        interval = policy.observe(tenant, [Homework(1, 'hw', 'reviewing')], 0)
+        assert interval == 120, (
+            'Пока работа на ревью, интервал должен быть коротким'
+        )
+        assert tenant.next_poll_at == 120
+        assert policy.observe(tenant, [], 120) == 120, (
+            'Статус reviewing должен помниться между пустыми ответами'
+        )
+
+    def test_any_reviewing_homework_polls_faster(self):
+        policy = make_policy()
+        tenant = Tenant('t', 'token', 1)
+        mixed = [
+            Homework(2, 'hw2', 'approved'), Homework(1, 'hw1', 'reviewing')
+        ]
+        assert policy.observe(tenant, mixed, 0) == 120, (
+            'Работа на ревью ускоряет опрос, даже если она не первая'
+        )
+        assert policy.observe(
+            tenant, [Homework(3, 'hw3', 'approved')], 120,
+            known=['reviewing', 'approved']
+        ) == 120, 'Работа на ревью из состояния тенанта тоже учитывается'
+        assert policy.observe(
+            tenant, [], 240, known=['approved', 'approved']
+        ) == 600
+
+    def test_idle_backoff_is_geometric_and_bounded(self):
+        policy = make_policy()
+        tenant = Tenant('t', 'token', 1)
+        assert policy.observe(tenant, [Homework(1, 'hw', 'approved')], 0) == 600
+        assert policy.observe(tenant, [], 1800) == 600, (
+            'До idle_after интервал должен оставаться базовым'
+        )
+        intervals = [policy.observe(tenant, [], 3600 * step)
+                     for step in range(2, 6)]
+        assert intervals == [1200, 2400, 3600, 3600], (
+            'Без изменений интервал должен расти геометрически до максимума'
+        )
+
+    def test_calls_per_day(self):
+        policy = make_policy()
+        tenants = [Tenant('a', 'a', 1), Tenant('b', 'b', 2)]
+        tenants[1].interval = 3600
+        assert policy.calls_per_day(tenants) == 144 + 24
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+import pytest
+
+from deadline import Deadline
+from exceptions import DeadlineExceededError
+from ratelimit import FileBucketStore, MemoryBucketStore, RateLimiter
+from utils import FakeClock
+
+
+def make_limiter(store):
+    return RateLimiter(store, global_rate=10, global_burst=3,
+                       token_rate=1, token_burst=2)
+
+
+class TestRateLimiter:
+
+    @pytest.mark.parametrize('backend', ['memory', 'file'])
+    def test_per_token_and_global_budgets(self, backend, tmp_path):
+        clock = FakeClock()
+        if backend == 'memory':
+            store = MemoryBucketStore(clock=clock)
+        else:
+            store = FileBucketStore(str(tmp_path / 'buckets'), clock=clock)
+        limiter = make_limiter(store)
+        buckets = limiter.buckets('OAuth a')
+        assert store.take(buckets) == 0
+        assert store.take(buckets) == 0
+        assert store.take(buckets) == pytest.approx(1), (
+            'После исчерпания ведра токена нужно ждать его пополнения'
+        )
+        assert store.take(limiter.buckets('OAuth b')) == 0
+        assert store.take(limiter.buckets('OAuth c')) == pytest.approx(0.1), (
+            'Общий бюджет должен ограничивать все токены вместе'
+        )
+        clock.now = 1
+        assert store.take(buckets) == 0
+
+    def test_file_store_is_shared(self, tmp_path):
+        clock = FakeClock()
+        path = str(tmp_path / 'buckets')
+        first = make_limiter(FileBucketStore(path, clock=clock))
+        second = make_limiter(FileBucketStore(path, clock=clock))
+        first.store.take(first.buckets('OAuth a'))
+        first.store.take(first.buckets('OAuth a'))
+        assert second.store.take(second.buckets('OAuth a')) > 0, (
+            'Процессы с одним файлом должны делить бюджет'
+        )
+
+    def test_async_acquire_takes_file_lock_off_loop(self, tmp_path):
+        threads = []
+
+        class RecordingStore(FileBucketStore):
+            def take(self, buckets):
+                threads.append(threading.get_ident())
+                return super().take(buckets)
+
+        limiter = make_limiter(RecordingStore(str(tmp_path / 'buckets')))
+        asyncio.run(limiter.acquire_async('OAuth a'))
+        assert threads and threads[0] != threading.get_ident(), (
+            'Блокировка файла не должна останавливать цикл событий'
+        )
+
+    def test_wait_longer_than_deadline_raises(self):
+        clock = FakeClock()
+        limiter = make_limiter(MemoryBucketStore(clock=clock))
+        limiter.acquire('OAuth a')
+        limiter.acquire('OAuth a')
+        with pytest.raises(DeadlineExceededError):
+            limiter.acquire('OAuth a', Deadline(0.5, clock=clock))
@@ -0,0 +1,47 @@
+import sys
+
+import pytest
+
+from records import Homework, HomeworkStatus
+
+
+class TestHomework:
+
+    def test_from_dict(self):
+        homework = Homework.from_dict({
+            'id': 123,
+            'homework_name': 'hw123',
+            'status': 'approved',
+            'reviewer_comment': 'Всё нравится',
+            'date_updated': '2020-02-13T14:40:57Z',
+            'lesson_name': 'Итоговый проект',
+        })
+        assert homework.status is HomeworkStatus.APPROVED
+        assert homework.status == 'approved'
+        assert str(homework.status) == 'approved'
+        assert homework.key == '123'
+        assert homework.reviewer_comment == 'Всё нравится'
+        assert homework == Homework(
+            123, 'hw123', HomeworkStatus.APPROVED,
+            '2020-02-13T14:40:57Z', 'Всё нравится'
+        )
+
+    def test_values_are_interned(self):
+        name = ''.join(['hw', '-interned'])
+        first = Homework.from_dict({'homework_name': name, 'status': 'x'})
+        second = Homework.from_dict({'homework_name': name[:],
+                                     'status': ''.join(['x'])})
+        assert first.name is sys.intern(name)
+        assert first.name is second.name
+        assert first.status is second.status
+        assert first.key == name, 'Без id ключом должно быть название'
+
+    def test_immutable_and_slotted(self):
+        homework = Homework(1, 'hw', HomeworkStatus.REVIEWING)
+        with pytest.raises(AttributeError):
+            homework.status = HomeworkStatus.APPROVED
+        assert not hasattr(homework, '__dict__')
+
+    def test_missing_name(self):
+        with pytest.raises(KeyError):
+            Homework.from_dict({'status': 'approved'})
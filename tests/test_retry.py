@@ -0,0 +1,130 @@
+import pytest
+
+from exceptions import (CircuitOpenError, DeadlineExceededError,
+                        EmptyResponseError, HTTPStatusError,
+                        RequestRejectedError, ResponseError)
+from retry import CircuitBreaker, RetryPolicy, status_error
+from utils import FakeClock
+
+
+class TestCircuitBreaker:
+
+    def test_opens_and_recovers_through_half_open(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(
+            failure_threshold=2, recovery_timeout=10, clock=clock
+        )
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow(), (
+            'Разомкнутый предохранитель должен отклонять запросы'
+        )
+        clock.now = 10
+        assert breaker.allow()
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert not breaker.allow(), (
+            'В half-open должен проходить только один пробный запрос'
+        )
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_failed_trial_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(
+            failure_threshold=1, recovery_timeout=10, clock=clock
+        )
+        breaker.record_failure()
+        clock.now = 15
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert breaker.seconds_until_retry() == 10
+
+
+class TestRetryPolicy:
+
+    def test_retries_transient_errors(self):
+        delays = []
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) < 3:
+                raise ResponseError('timeout')
+            return 'ok'
+
+        policy = RetryPolicy(attempts=3, base_delay=1, max_delay=3,
+                             sleep=delays.append)
+        assert policy.call(flaky) == 'ok'
+        assert len(delays) == 2
+        assert 0 <= delays[0] <= 1 and 0 <= delays[1] <= 2, (
+            'Задержка должна выбираться из [0, base_delay * 2 ** attempt]'
+        )
+
+    def test_does_not_retry_other_errors(self):
+        calls = []
+
+        def broken():
+            calls.append(1)
+            raise EmptyResponseError('пусто')
+
+        policy = RetryPolicy(sleep=lambda delay: None)
+        with pytest.raises(EmptyResponseError):
+            policy.call(broken)
+        assert len(calls) == 1
+
+    def test_open_circuit_rejects_calls(self):
+        breaker = CircuitBreaker(failure_threshold=1)
+
+        def down():
+            raise ResponseError('down')
+
+        policy = RetryPolicy(attempts=1, breaker=breaker)
+        with pytest.raises(ResponseError):
+            policy.call(down)
+        with pytest.raises(CircuitOpenError):
+            policy.call(down)
+
+    def test_trial_is_released_on_other_errors(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(
+            failure_threshold=1, recovery_timeout=10, clock=clock
+        )
+        breaker.record_failure()
+        clock.now = 10
+
+        def slow():
+            raise DeadlineExceededError('нет времени')
+
+        policy = RetryPolicy(attempts=1, breaker=breaker)
+        with pytest.raises(DeadlineExceededError):
+            policy.call(slow)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert policy.call(lambda: 'ok') == 'ok', (
+            'Пробный запрос, упавший с другой ошибкой, не должен '
+            'навсегда занимать half-open'
+        )
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_client_errors_are_not_retried_or_counted(self):
+        assert isinstance(status_error(401), RequestRejectedError)
+        assert isinstance(status_error(429), HTTPStatusError)
+        assert isinstance(status_error(502), HTTPStatusError)
+        breaker = CircuitBreaker(failure_threshold=1)
+        calls = []
+
+        def revoked():
+            calls.append(1)
+            raise status_error(401)
+
+        policy = RetryPolicy(breaker=breaker, sleep=lambda delay: None)
+        for _ in range(3):
+            with pytest.raises(RequestRejectedError):
+                policy.call(revoked)
+        assert len(calls) == 3, '4xx не должны повторяться'
+        assert breaker.state == CircuitBreaker.CLOSED, (
+            'Отозванный токен одного тенанта не должен размыкать '
+            'предохранитель для всех'
+        )
@@ -0,0 +1,132 @@
+import threading
+import time
+
+import pytest
+
+import homework
+from deadline import Deadline
+from exceptions import ResponseError, ShutdownError
+from ratelimit import RateLimiter
+from retry import RetryPolicy
+from wakeup import Wakeup
+
+
+class FakeOutbox:
+
+    def __init__(self):
+        self.messages = []
+
+    def put(self, chat_id, text, key=None):
+        self.messages.append((chat_id, text))
+
+    def stats(self):
+        return {}
+
+
+class TestShutdown:
+
+    def test_poll_forever_stops_on_shutdown(self, monkeypatch):
+        polled = []
+
+        def mock_poll_tenant(outbox, tenant):
+            polled.append(tenant)
+            tenant.next_poll_at = time.time() + 600
+
+        monkeypatch.setattr(homework, 'poll_tenant', mock_poll_tenant)
+        monkeypatch.setattr(homework, 'SHUTDOWN', threading.Event())
+        monkeypatch.setattr(
+            homework, 'SHUTDOWN_DEADLINE', Deadline(float('inf'))
+        )
+        monkeypatch.setattr(homework, 'WAKEUP', Wakeup())
+        monkeypatch.setattr(homework, 'POLL_JITTER', 0)
+        tenants = [homework.Tenant('t', 'token', 1, 0)]
+        worker = threading.Thread(
+            target=homework.poll_forever, args=(FakeOutbox(), tenants)
+        )
+        worker.start()
+        time.sleep(0.2)
+        started = time.monotonic()
+        homework.request_shutdown(homework.signal.SIGTERM, None)
+        worker.join(5)
+        assert not worker.is_alive(), (
+            'Цикл опроса должен завершаться по сигналу, а не спать '
+            'до следующего опроса'
+        )
+        assert time.monotonic() - started < 1
+        assert polled == tenants
+
+    def test_request_shutdown_sets_event(self, monkeypatch):
+        monkeypatch.setattr(homework, 'SHUTDOWN', threading.Event())
+        monkeypatch.setattr(
+            homework, 'SHUTDOWN_DEADLINE', Deadline(float('inf'))
+        )
+        monkeypatch.setattr(homework, 'WAKEUP', Wakeup())
+        homework.request_shutdown(homework.signal.SIGTERM, None)
+        assert homework.SHUTDOWN.is_set()
+        assert homework.SHUTDOWN_DEADLINE.remaining() <= (
+            homework.SHUTDOWN_TIMEOUT
+        ), 'С сигнала на остановку остается SHUTDOWN_TIMEOUT секунд'
+
+    def test_shutdown_aborts_limiter_and_retry_loops(self, monkeypatch):
+        monkeypatch.setattr(homework, 'SHUTDOWN', threading.Event())
+        takes = []
+        calls = []
+
+        class ExhaustedStore:
+            blocking = False
+
+            def take(self, buckets):
+                takes.append(buckets)
+                return 5
+
+        def failing():
+            calls.append(1)
+            raise ResponseError('API недоступен')
+
+        limiter = RateLimiter(ExhaustedStore(), 1, 1, 1, 1,
+                              sleep=homework.API_LIMITER.sleep)
+        policy = RetryPolicy(attempts=5, sleep=homework.API_RETRY.sleep)
+        threading.Timer(0.1, homework.SHUTDOWN.set).start()
+        started = time.monotonic()
+        with pytest.raises(ShutdownError):
+            limiter.acquire('OAuth a')
+        with pytest.raises(ShutdownError):
+            policy.call(failing)
+        assert time.monotonic() - started < 1
+        assert len(takes) == 1, (
+            'После остановки лимитер не должен крутиться на take()'
+        )
+        assert calls == [1], (
+            'После остановки оставшиеся попытки не должны выполняться'
+        )
+
+    def test_check_request_polls_immediately(self, monkeypatch):
+        polled = []
+
+        def mock_poll_tenant(outbox, tenant):
+            polled.append(tenant)
+            tenant.next_poll_at = time.time() + 600
+
+        monkeypatch.setattr(homework, 'poll_tenant', mock_poll_tenant)
+        monkeypatch.setattr(homework, 'SHUTDOWN', threading.Event())
+        monkeypatch.setattr(
+            homework, 'SHUTDOWN_DEADLINE', Deadline(float('inf'))
+        )
+        monkeypatch.setattr(homework, 'WAKEUP', Wakeup())
+        monkeypatch.setattr(homework, 'POLL_JITTER', 0)
+        tenants = [homework.Tenant('a', 'token', 1, 0),
+                   homework.Tenant('b', 'token', 2, 0)]
+        outbox = FakeOutbox()
+        worker = threading.Thread(
+            target=homework.poll_forever, args=(outbox, tenants)
+        )
+        worker.start()
+        time.sleep(0.2)
+        homework.check_requested(outbox, '2')
+        time.sleep(0.2)
+        homework.request_shutdown(homework.signal.SIGTERM, None)
+        worker.join(5)
+        assert polled == [tenants[0], tenants[1], tenants[1]], (
+            'Команда /check должна сразу опрашивать тенанта своего чата'
+        )
+        assert outbox.messages == [('2', homework.CHECK_REPLY)]
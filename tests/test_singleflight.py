@@ -0,0 +1,77 @@
+import asyncio
+import threading
+
+import pytest
+
+from singleflight import AsyncSingleFlight, SingleFlight
+
+
+class TestSingleFlight:
+
+    def test_concurrent_calls_share_one_execution(self):
+        flights = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def slow_fetch():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {'homeworks': []}
+
+        results = []
+        leader = threading.Thread(
+            target=lambda: results.append(flights.do('key', slow_fetch))
+        )
+        leader.start()
+        started.wait(5)
+        waiters = [
+            threading.Thread(
+                target=lambda: results.append(flights.do('key', slow_fetch))
+            )
+            for _ in range(3)
+        ]
+        for waiter in waiters:
+            waiter.start()
+        while flights.shared < 3:
+            pass
+        release.set()
+        for thread in [leader, *waiters]:
+            thread.join(5)
+        assert len(calls) == 1, (
+            'Одинаковые одновременные запросы должны выполняться один раз'
+        )
+        assert len(results) == 4
+        assert all(result is results[0] for result in results)
+
+    def test_error_is_not_cached(self):
+        flights = SingleFlight()
+
+        def broken():
+            raise ValueError('boom')
+
+        with pytest.raises(ValueError):
+            flights.do('key', broken)
+        assert flights.do('key', lambda: 'ok') == 'ok'
+
+
+class TestAsyncSingleFlight:
+
+    def test_concurrent_coroutines_share_one_execution(self):
+        flights = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'response'
+
+        async def run():
+            return await asyncio.gather(
+                *(flights.do('key', fetch) for _ in range(5))
+            )
+
+        assert asyncio.run(run()) == ['response'] * 5
+        assert len(calls) == 1
+        assert flights.shared == 4
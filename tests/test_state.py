@@ -0,0 +1,74 @@
+from records import Homework
+from state import HomeworkState, StateCache, StateStore
+
+
+class TestHomeworkState:
+
+    def test_diff_returns_only_transitions(self):
+        state = HomeworkState()
+        homeworks = [
+            Homework(2, 'hw2', 'reviewing'),
+            Homework(1, 'hw1', 'approved'),
+        ]
+        changed = state.diff(homeworks)
+        assert [homework.id for homework in changed] == [1, 2], (
+            'Изменения должны отдаваться от старых к новым'
+        )
+        for homework in changed:
+            state.update(homework)
+        assert state.diff(homeworks) == [], (
+            'Повторный ответ без изменений не должен давать уведомлений'
+        )
+        homeworks[0] = Homework(2, 'hw2', 'approved')
+        assert state.diff(homeworks) == [homeworks[0]]
+
+    def test_diff_does_not_update_state(self):
+        state = HomeworkState()
+        homework = Homework(1, 'hw1', 'approved')
+        state.diff([homework])
+        assert state.statuses == {}
+        state.update(homework)
+        assert state.statuses == {'1': 'approved'}
+
+
+class TestStateCache:
+
+    def make_state(self, *statuses):
+        state = HomeworkState()
+        for index, status in enumerate(statuses):
+            state.update(Homework(index, f'hw{index}', status))
+        return state
+
+    def test_evicts_least_recently_used_to_disk(self, tmp_path):
+        store = StateStore(str(tmp_path))
+        cache = StateCache(store, max_entries=3)
+        cache.put('a', self.make_state('approved', 'rejected'))
+        cache.put('b', self.make_state('reviewing'))
+        assert cache.get('a').statuses == {'0': 'approved', '1': 'rejected'}
+        cache.put('c', self.make_state('approved'))
+        stats = cache.stats()
+        assert stats['resident'] == 2, (
+            'При превышении лимита должен выгружаться давний тенант'
+        )
+        assert stats['entries'] == 3
+        assert stats['evictions'] == 1
+        assert store.load('b').statuses == {'0': 'reviewing'}, (
+            'Выгруженное состояние должно сохраняться на диск'
+        )
+        assert cache.get('b').statuses == {'0': 'reviewing'}, (
+            'При промахе состояние должно читаться с диска'
+        )
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+
+    def test_flush_saves_dirty_states(self, tmp_path):
+        store = StateStore(str(tmp_path))
+        cache = StateCache(store)
+        state = cache.get('a')
+        state.update(Homework(1, 'hw1', 'approved'))
+        cache.put('a', state)
+        assert store.load('a').statuses == {}
+        cache.flush()
+        assert store.load('a').statuses == {'1': 'approved'}
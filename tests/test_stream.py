@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from exceptions import EmptyResponseError
+from stream import HomeworkStream
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestHomeworkStream:
+
+    @pytest.mark.parametrize('size', [1, 3, 1024])
+    def test_yields_every_homework(self, size):
+        response = {
+            'current_date': 1000,
+            'homeworks': [
+                {'homework_name': f'hw{i}', 'status': 'approved',
+                 'reviewer_comment': 'Всё нравится'}
+                for i in range(20)
+            ],
+        }
+        body = json.dumps(response, ensure_ascii=False).encode('utf-8')
+        stream = HomeworkStream(chunked(body, size))
+        assert list(stream) == response['homeworks'], (
+            'Поток должен отдать все домашки независимо от размера кусков'
+        )
+        assert stream.current_date == 1000
+        assert stream.count == 20
+
+    @pytest.mark.parametrize('body, error', [
+        (b'[]', TypeError),
+        (b'{"homeworks": {}, "current_date": 1}', KeyError),
+        (b'{"homeworks": [1], "current_date": 1}', TypeError),
+        (b'{"homeworks": []}', EmptyResponseError),
+        (b'{"homeworks": [{"status": "app', json.JSONDecodeError),
+    ])
+    def test_invalid_response(self, body, error):
+        with pytest.raises(error):
+            list(HomeworkStream(chunked(body, 4)))
+
+    def test_close_releases_connection(self):
+        closed = []
+        with HomeworkStream([b'{}'], close=lambda: closed.append(1)):
+            pass
+        assert closed == [1]
@@ -0,0 +1,153 @@
+import gc
+import os
+import signal
+import time
+
+import pytest
+
+from ratelimit import FileBucketStore, MemoryBucketStore, RateLimiter
+from supervisor import (HashRing, Supervisor, memory_usage, shard,
+                        share_rate_limits)
+from tenants import Tenant
+
+
+def crash(index):
+    os._exit(3)
+
+
+def sleep(index):
+    time.sleep(30)
+
+
+class TestHashRing:
+
+    def test_keys_are_balanced_and_stable(self):
+        keys = [f'student-{index}' for index in range(5000)]
+        ring = HashRing(range(4))
+        owners = [ring.node_for(key) for key in keys]
+        assert owners == [HashRing(range(4)).node_for(key) for key in keys]
+        for node in range(4):
+            assert 0.15 < owners.count(node) / len(keys) < 0.35, (
+                'Тенанты должны делиться между воркерами примерно поровну'
+            )
+
+    def test_resize_moves_few_keys(self):
+        keys = [f'student-{index}' for index in range(5000)]
+        before = HashRing(range(4))
+        after = HashRing(range(5))
+        moved = sum(
+            before.node_for(key) != after.node_for(key) for key in keys
+        )
+        assert moved / len(keys) < 0.3, (
+            'При добавлении воркера должна переезжать примерно 1/N тенантов'
+        )
+        assert all(
+            after.node_for(key) == 4 for key in keys
+            if before.node_for(key) != after.node_for(key)
+        ), 'Переезжать можно только на новый воркер'
+
+    def test_shard_partitions_tenants(self):
+        tenants = [Tenant(str(index), 'token', index) for index in range(50)]
+        shards = [shard(tenants, index, 3) for index in range(3)]
+        assert sorted(
+            (tenant for part in shards for tenant in part), key=tenants.index
+        ) == tenants
+
+
+class TestSupervisor:
+
+    @pytest.fixture(autouse=True)
+    def unfreeze_heap(self):
+        yield
+        gc.unfreeze()
+
+    def test_workers_share_api_rate_limit(self, tmp_path):
+        limiter = RateLimiter(MemoryBucketStore(), 10, 20, 1, 1)
+        share_rate_limits(limiter, str(tmp_path / 'ratelimit.json'))
+        assert isinstance(limiter.store, FileBucketStore), (
+            'При нескольких воркерах глобальный бюджет API должен '
+            'быть общим, а не у каждого процесса своим'
+        )
+        store = FileBucketStore(str(tmp_path / 'own.json'))
+        limiter = RateLimiter(store, 10, 20, 1, 1)
+        share_rate_limits(limiter, str(tmp_path / 'ratelimit.json'))
+        assert limiter.store is store
+
+    def test_crashed_worker_is_restarted(self):
+        supervisor = Supervisor(crash, workers=2, restart_delay=0).start()
+        try:
+            deadline = time.monotonic() + 5
+            while supervisor.restarts < 2 and time.monotonic() < deadline:
+                supervisor.check()
+                time.sleep(0.05)
+            assert supervisor.restarts >= 2, (
+                'Упавшие воркеры должны перезапускаться'
+            )
+        finally:
+            supervisor.stop(5)
+
+    def test_restart_delay_grows(self):
+        supervisor = Supervisor(crash, workers=1, restart_delay=1,
+                                max_restart_delay=4, stable_after=60)
+        supervisor._failures[0] = 5
+        supervisor.start()
+        try:
+            time.sleep(0.2)
+            assert supervisor.check() == 4, (
+                'Задержка перезапуска ограничена max_restart_delay'
+            )
+        finally:
+            supervisor.stop(5)
+
+    def test_sigusr1_does_not_kill_starting_workers(self):
+        supervisor = Supervisor(sleep, workers=2).start()
+        try:
+            time.sleep(0.2)
+            supervisor.broadcast(signal.SIGUSR1)
+            time.sleep(0.2)
+            assert len(supervisor.pids()) == 2, (
+                'SIGUSR1 до установки обработчика не должен убивать воркер'
+            )
+        finally:
+            supervisor.stop(5)
+
+    def test_stop_terminates_workers(self):
+        supervisor = Supervisor(sleep, workers=2).start()
+        assert len(supervisor.pids()) == 2
+        started = time.monotonic()
+        supervisor.stop(5)
+        assert time.monotonic() - started < 5
+        assert supervisor.pids() == {}
+
+    def test_workers_start_with_frozen_heap(self, tmp_path):
+        path = tmp_path / 'gc.txt'
+
+        def target(index):
+            path.write_text(f'{gc.get_freeze_count()} {gc.isenabled()}')
+
+        supervisor = Supervisor(target, workers=1).start()
+        try:
+            supervisor._processes[0].join(5)
+        finally:
+            supervisor.stop(5)
+        frozen, enabled = path.read_text().split()
+        assert int(frozen) > 0, (
+            'Объекты супервизора должны замораживаться перед fork'
+        )
+        assert enabled == 'True', 'В воркере сборщик мусора включен'
+
+    @pytest.mark.skipif(
+        memory_usage(os.getpid()) is None, reason='нет /proc/<pid>/smaps_rollup'
+    )
+    def test_memory_report(self):
+        supervisor = Supervisor(sleep, workers=2).start()
+        try:
+            memory = supervisor.report()
+        finally:
+            supervisor.stop(5)
+        assert sorted(memory) == [0, 1]
+        for usage in memory.values():
+            assert usage['rss'] > 0
+            assert usage['shared'] > 0, (
+                'Воркеры должны делить страницы с супервизором'
+            )
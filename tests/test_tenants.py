@@ -0,0 +1,159 @@
+import json
+import threading
+import time
+
+import pytest
+
+from tenants import Tenant, TenantScheduler, default_name, load_tenants
+
+
+class TestTenants:
+
+    def test_load_tenants(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'name': 'ivan', 'practicum_token': 'a',
+             'telegram_chat_id': 1},
+            {'practicum_token': 'b', 'telegram_chat_id': 2},
+        ]), encoding='utf-8')
+        tenants = load_tenants(path, current_timestamp=100)
+        assert [tenant.name for tenant in tenants] == [
+            'ivan', default_name('b')
+        ]
+        assert tenants[1].headers == {'Authorization': 'OAuth b'}, (
+            'У каждого тенанта должны быть свои заголовки авторизации'
+        )
+        assert all(tenant.current_timestamp == 100 for tenant in tenants)
+
+    def test_default_name_does_not_depend_on_order(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        records = [
+            {'practicum_token': 'a', 'telegram_chat_id': 1},
+            {'practicum_token': 'b', 'telegram_chat_id': 2},
+        ]
+        path.write_text(json.dumps(records))
+        before = {t.practicum_token: t.name for t in load_tenants(path)}
+        path.write_text(json.dumps(records[::-1]))
+        after = {t.practicum_token: t.name for t in load_tenants(path)}
+        assert before == after, (
+            'Перестановка записей не должна менять имена тенантов'
+        )
+
+    def test_duplicate_names_rejected(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([
+            {'practicum_token': 'a', 'telegram_chat_id': 1},
+            {'practicum_token': 'a', 'telegram_chat_id': 2},
+        ]))
+        with pytest.raises(ValueError):
+            load_tenants(path)
+
+    def test_load_tenants_missing_key(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(json.dumps([{'practicum_token': 'a'}]))
+        with pytest.raises(KeyError):
+            load_tenants(path)
+
+    def test_scheduler_polls_every_tenant_with_bounded_workers(self):
+        polled = []
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def poll(tenant):
+            with lock:
+                running.append(tenant)
+                peak.append(len(running))
+            with lock:
+                running.remove(tenant)
+                polled.append(tenant)
+
+        tenants = [Tenant(str(index), 'token', index) for index in range(20)]
+        with TenantScheduler(tenants, poll, max_workers=3) as sched:
+            sched.dispatch()
+        assert sorted(polled, key=tenants.index) == tenants
+        assert max(peak) <= 3, (
+            'Одновременно должно опрашиваться не больше max_workers тенантов'
+        )
+
+    def test_scheduler_pops_due_tenants_in_order(self):
+        tenants = [Tenant(str(index), 'token', index) for index in range(5)]
+        for index, tenant in enumerate(tenants):
+            tenant.next_poll_at = 100 - index * 10
+        polled = []
+
+        def poll(tenant):
+            polled.append(tenant)
+            tenant.next_poll_at += 1000
+
+        with TenantScheduler(tenants, poll, max_workers=1) as sched:
+            assert sched.seconds_until_next(0) == 60
+            assert sched.due(80) == [tenants[4], tenants[3], tenants[2]]
+            sched.schedule(tenants[4], 70)
+            sched.schedule(tenants[4], 200)
+            assert sched.due(100) == [tenants[1], tenants[0]], (
+                'Перенесенный срок опроса должен отменять прежний'
+            )
+            sched.dispatch(200)
+        assert polled == [tenants[4]]
+        assert sched.seconds_until_next(0) == 1060
+
+    def test_dispatch_does_not_wait_for_slow_tenant(self):
+        release = threading.Event()
+        rescheduled = []
+        slow, fast = Tenant('slow', 'token', 1), Tenant('fast', 'token', 2)
+
+        def poll(tenant):
+            if tenant is slow:
+                release.wait(5)
+            tenant.next_poll_at = 100
+
+        sched = TenantScheduler(
+            [slow, fast], poll, max_workers=2,
+            on_rescheduled=lambda: rescheduled.append(1)
+        )
+        with sched:
+            started = time.monotonic()
+            sched.dispatch(0)
+            assert time.monotonic() - started < 1, (
+                'Раздача опросов не должна ждать медленного тенанта'
+            )
+            deadline = time.monotonic() + 5
+            while not rescheduled and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert sched.seconds_until_next(0) == 100, (
+                'Быстрый тенант должен вернуться в расписание сразу'
+            )
+            assert sched.dispatch(0) == [], (
+                'Тенант, чей опрос идет, повторно не запускается'
+            )
+            release.set()
+
+    def test_check_during_poll_runs_after_it(self):
+        release = threading.Event()
+        tenant = Tenant('t', 'token', 1)
+        polls = []
+
+        def poll(tenant):
+            polls.append(tenant)
+            release.wait(5)
+            tenant.next_poll_at = 1000
+
+        with TenantScheduler([tenant], poll, max_workers=1) as sched:
+            sched.dispatch(0)
+            sched.schedule(tenant, 0, jitter=False)
+            assert sched.dispatch(0) == []
+            release.set()
+        assert sched.seconds_until_next(0) == 0, (
+            'Проверка, запрошенная во время опроса, не должна теряться'
+        )
+
+    def test_scheduler_jitter_spreads_polls(self):
+        tenants = [Tenant(str(index), 'token', index) for index in range(4)]
+        offsets = iter([0, 0.25, 0.5, 0.75])
+        sched = TenantScheduler(tenants, lambda tenant: None, max_workers=1,
+                                jitter=40, random=lambda: next(offsets))
+        assert sched.due(0) == [tenants[0]]
+        assert sched.due(15) == [tenants[1]]
+        assert sched.seconds_until_next(15) == 5
+        sched.shutdown()
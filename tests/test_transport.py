@@ -0,0 +1,35 @@
+import requests
+
+from transport import ApiTransport
+
+
+class TestApiTransport:
+
+    def test_get_without_session_uses_requests_get(self, monkeypatch):
+        calls = []
+        monkeypatch.setattr(
+            requests, 'get', lambda url, **kwargs: calls.append(url)
+        )
+        transport = ApiTransport()
+        transport.get('https://example.com')
+        assert calls == ['https://example.com'], (
+            'Без открытой сессии запрос должен уходить через requests.get'
+        )
+
+    def test_open_close_lifecycle(self):
+        transport = ApiTransport(pool_connections=2, pool_maxsize=4)
+        with transport:
+            session = transport.session
+            assert isinstance(session, requests.Session), (
+                'Внутри контекста транспорт должен держать открытую сессию'
+            )
+            adapter = session.get_adapter('https://practicum.yandex.ru')
+            assert adapter._pool_maxsize == 4, (
+                'Адаптер сессии должен получать размер пула из настроек'
+            )
+            assert transport.open() is session, (
+                'Повторный open() не должен пересоздавать сессию'
+            )
+        assert transport.session is None, (
+            'После выхода из контекста сессия должна быть закрыта'
+        )
@@ -0,0 +1,26 @@
+import threading
+import time
+
+from wakeup import Wakeup
+
+
+class TestWakeup:
+
+    def test_wait_times_out(self):
+        started = time.monotonic()
+        assert Wakeup().wait(0.05) == set()
+        assert time.monotonic() - started >= 0.05
+
+    def test_wake_interrupts_wait(self):
+        wakeup = Wakeup()
+        threading.Timer(0.05, wakeup.request_check, args=(42,)).start()
+        started = time.monotonic()
+        assert wakeup.wait(5) == {'42'}
+        assert time.monotonic() - started < 1, (
+            'Ожидание должно прерываться сразу после пробуждения'
+        )
+        wakeup.request_check()
+        wakeup.wake()
+        assert wakeup.wait(5) == {Wakeup.ALL}, (
+            'Пробуждение до начала ожидания не должно теряться'
+        )
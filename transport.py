@@ -0,0 +1,53 @@
+"""HTTP-транспорт к API Практикума с пулом keep-alive соединений."""
+import requests
+from requests.adapters import HTTPAdapter
+
+from exceptions import ResponseError
+
+
+class ApiTransport:
+    """Долгоживущая сессия requests с настраиваемым пулом соединений.
+
+    Пока сессия не открыта, запросы уходят через requests.get,
+    так что функции бота можно вызывать и вне main().
+    """
+
+    def __init__(self, pool_connections=1, pool_maxsize=10):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.session = None
+
+    def open(self):
+        """Открываем сессию и монтируем адаптер с пулом соединений."""
+        if self.session is None:
+            adapter = HTTPAdapter(
+                pool_connections=self.pool_connections,
+                pool_maxsize=self.pool_maxsize
+            )
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            self.session = session
+        return self.session
+
+    def close(self):
+        """Закрываем сессию и все соединения пула."""
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+    def get(self, url, **kwargs):
+        """GET-запрос через открытую сессию или через requests.get."""
+        try:
+            if self.session is None:
+                return requests.get(url, **kwargs)
+            return self.session.get(url, **kwargs)
+        except requests.RequestException as error:
+            raise ResponseError(f'API недоступен: {error}')
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
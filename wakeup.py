@@ -0,0 +1,45 @@
+"""Прерываемое ожидание между циклами опроса."""
+import threading
+
+
+class Wakeup:
+    """Ожидание, которое можно прервать раньше срока.
+
+    wake() будит цикл опроса без других действий (например,
+    для остановки), request_check() еще и просит немедленно
+    опросить тенантов с указанным чатом или всех, если чат
+    не указан. Методы можно вызывать из обработчиков сигналов.
+    """
+
+    ALL = None
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._checks = set()
+        self._woken = False
+
+    def wake(self):
+        """Прерываем текущее или ближайшее ожидание."""
+        with self._cond:
+            self._woken = True
+            self._cond.notify_all()
+
+    def request_check(self, chat_id=ALL):
+        """Просим опросить тенантов чата chat_id прямо сейчас."""
+        with self._cond:
+            self._checks.add(self.ALL if chat_id is None else str(chat_id))
+            self._woken = True
+            self._cond.notify_all()
+
+    def wait(self, timeout=None):
+        """Ждем timeout секунд или пробуждения.
+
+        Возвращает множество запрошенных чатов: ALL означает
+        всех тенантов, пустое множество - плановое пробуждение.
+        """
+        with self._cond:
+            if not self._woken:
+                self._cond.wait(timeout)
+            self._woken = False
+            checks, self._checks = self._checks, set()
+        return checks